@@ -0,0 +1,232 @@
+# === async_processor.py ===
+import os
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from deadline import DeadlineExceeded
+from utils import DocumentProcessor, S3_PREFIX, TRANSFER_CONCURRENCY, _path_levels, _to_s3_key
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _h = logging.StreamHandler()
+    _h.setFormatter(logging.Formatter('%(levelname)s\t%(asctime)s\t%(message)s'))
+    logger.addHandler(_h)
+logger.setLevel(logging.INFO)
+
+# Upper bounds on concurrent operations per kind (the AIMD controllers in
+# DocumentProcessor still decide how many Filevine calls are actually in flight)
+ASYNC_HTTP_CONCURRENCY     = int(os.getenv("FV_ASYNC_HTTP_CONCURRENCY", "32"))
+ASYNC_S3_CONCURRENCY       = int(os.getenv("FV_ASYNC_S3_CONCURRENCY", "64"))
+ASYNC_TRANSFER_CONCURRENCY = TRANSFER_CONCURRENCY  # matches the storage connection pool
+ASYNC_MAX_WORKERS          = int(os.getenv("FV_ASYNC_MAX_WORKERS", "96"))
+
+
+class AsyncDocumentProcessor:
+    """
+    asyncio engine with the same public surface as DocumentProcessor:
+    sync_documents / handle_single_document_upload / handle_document_delete
+    are coroutines returning the same result dicts.
+
+    Blocking requests/boto3 calls run on a dedicated thread pool, fanned out
+    under bounded semaphores, so folder BFS levels, link batches, placeholders
+    and transfers all overlap. HTTP still goes through the wrapped processor's
+    request layer (rate limiter, AIMD, 401 refresh) and shares its caches.
+    """
+    def __init__(self, proc: Optional[DocumentProcessor] = None):
+        self.proc      = proc or DocumentProcessor()
+        self._executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix="fv-async")
+
+    # ---------------------------
+    # Plumbing
+    # ---------------------------
+    def _new_limits(self) -> None:
+        # Semaphores bind to the running loop, and asyncio.run() makes a new loop per call
+        self._http_sem     = asyncio.Semaphore(ASYNC_HTTP_CONCURRENCY)
+        self._s3_sem       = asyncio.Semaphore(ASYNC_S3_CONCURRENCY)
+        self._transfer_sem = asyncio.Semaphore(ASYNC_TRANSFER_CONCURRENCY)
+
+    async def _run(self, sem: asyncio.Semaphore, fn, *args, **kwargs):
+        async with sem:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def _drain(self, items: Iterable, worker: Callable[[object], Awaitable], concurrency: int) -> list:
+        """
+        await worker(item) for every item, `concurrency` at a time, fed through a bounded
+        queue: only that many tasks (and a few queued items) exist at once, however many
+        items there are. Results come back in input order; the first exception cancels the rest.
+        """
+        concurrency = max(1, concurrency)
+        work: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+        results: List[object] = []
+
+        async def produce() -> None:
+            for i, item in enumerate(items):
+                results.append(None)
+                await work.put((i, item))
+            for _ in range(concurrency):
+                await work.put(None)
+
+        async def consume() -> None:
+            while True:
+                job = await work.get()
+                if job is None:
+                    return
+                i, item = job
+                results[i] = await worker(item)
+
+        tasks = [asyncio.ensure_future(produce())] + [asyncio.ensure_future(consume()) for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return results
+
+    async def _offload(self, fn, *args, **kwargs):
+        """Run a call that fans out (and limits itself) on its own, outside the semaphores."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def _api(self, fn, *args, **kwargs):
+        return await self._run(self._http_sem, fn, *args, **kwargs)
+
+    async def _s3(self, fn, *args, **kwargs):
+        return await self._run(self._s3_sem, fn, *args, **kwargs)
+
+    # ---------------------------
+    # Folder structure
+    # ---------------------------
+    async def fetch_complete_folder_structure(self, project_id: int, headers: dict) -> Dict[int, str]:
+        # One crawl implementation: the processor's BFS already lists each level concurrently
+        # (FV_CRAWL_CONCURRENCY) and falls back to document-derived folders
+        return await self._offload(self.proc.fetch_complete_folder_structure, project_id, headers)
+
+    # ---------------------------
+    # S3 placeholders and download links
+    # ---------------------------
+    async def ensure_placeholders(self, project_prefix: str, folder_paths: Set[str]) -> None:
+        levels = {lvl for p in folder_paths for lvl in _path_levels(p)}
+        await self._drain(
+            sorted(levels),
+            lambda rel: self._s3(self.proc._ensure_placeholder, _to_s3_key(project_prefix, rel, ".placeholder")),
+            ASYNC_S3_CONCURRENCY,
+        )
+
+    async def get_download_links_batch(self, ids: List[int], headers: dict) -> Dict[int, str]:
+        # The processor already runs adaptively sized chunks concurrently and regroups misses
+        return await self._offload(self.proc.get_download_links_batch, ids, headers)
+
+    # ---------------------------
+    # Public surface
+    # ---------------------------
+    async def sync_documents(self, project_id: int, headers: dict, full_sweep: bool = False):
+        self._new_limits()
+        proc = self.proc
+        proc.metrics.reset()
+        proc.retry.budget.reset()
+        proc.get_flight.clear()
+        if proc.http_cache is not None:
+            proc.http_cache.reset_stats()
+        project_name   = await self._api(proc.get_project_name, project_id, headers)
+        project_prefix = f"{S3_PREFIX}{proc.sanitize(project_name)}/"
+        state  = proc._load_sync_state(project_id)
+        cutoff = state.cutoff(force_full=full_sweep)
+        logger.info(f"Starting async {'full' if cutoff is None else 'incremental'} sync for project {project_id} "
+                    f"-> prefix {project_prefix}")
+
+        # Same contract as the blocking engine: a deadline mid-sync is a partial result
+        docs: List[dict] = []
+        try:
+            outcomes = await self._sync_phases(project_id, headers, project_prefix, state, cutoff, docs)
+        except DeadlineExceeded as e:
+            state.listing_failed(e)
+            return proc._finish_sync(project_id, project_name, [None] * len(docs), state, cutoff, stopped=e)
+        return proc._finish_sync(project_id, project_name, outcomes, state, cutoff)
+
+    async def _sync_phases(self, project_id: int, headers: dict, project_prefix: str, state, cutoff,
+                           docs: List[dict]) -> List[Optional[bool]]:
+        proc = self.proc
+        # Stored folder map when it is recent enough, otherwise a full crawl alongside the doc listing
+        fresh = proc.begin_full_refresh(project_id)
+        if fresh is None:
+            folder_map = proc._active_map.paths()
+            documents  = await self._api(proc.fetch_all_documents, project_id, headers, state.listing_failed)
+        else:
+            folder_map, documents = await asyncio.gather(
+                self.fetch_complete_folder_structure(project_id, headers),
+                self._api(proc.fetch_all_documents, project_id, headers, state.listing_failed),
+            )
+            proc.finish_full_refresh(fresh, folder_map)
+        documents = proc._select_changed(documents, state, cutoff)
+        docs.extend(documents)
+        folder_paths, docs_with_paths = await self._api(
+            proc.ensure_all_folders_and_map_docs, project_prefix, folder_map, documents, headers
+        )
+        if cutoff is not None:
+            folder_paths = {d.folder_path for d in docs_with_paths} | {"Documents"}
+
+        ids = [d["id"] for d in docs_with_paths]
+        # Placeholders and link fetching don't depend on each other
+        _, link_by_id = await asyncio.gather(
+            self.ensure_placeholders(project_prefix, folder_paths),
+            self.get_download_links_batch(ids, headers),
+        )
+
+        return await self._drain(
+            docs_with_paths,
+            lambda d: self._run(self._transfer_sem, proc._transfer_document,
+                                d, link_by_id.get(d["id"]), project_id, project_prefix),
+            ASYNC_TRANSFER_CONCURRENCY,
+        )
+
+    async def handle_single_document_upload(self, body: dict, headers: dict):
+        # One document: nothing to fan out, but keep the event loop free
+        self._new_limits()
+        return await self._api(self.proc.handle_single_document_upload, body, headers)
+
+    async def handle_document_upload(self, body: dict, headers: dict):
+        return await self.handle_single_document_upload(body, headers)
+
+    async def handle_document_delete(self, body: dict, headers: dict):
+        self._new_limits()
+        proc = self.proc
+        try:
+            raw = body.get("documentId") or body.get("DocumentId")
+            if raw is None:
+                return proc.error_response(400, "Missing document ID")
+            document_id = raw.get("native") if isinstance(raw, dict) else int(raw)
+
+            project_id     = proc.extract_project_id(body)
+            project_name   = await self._api(proc.get_project_name, project_id, headers)
+            project_prefix = _to_s3_key(proc.prefix, project_name) + "/"
+
+            # Tag/metadata probes run in parallel, ASYNC_S3_CONCURRENCY at a time
+            keys = await self._s3(proc._list_project_keys, project_prefix)
+            hits = await self._drain(keys, lambda k: self._s3(proc._key_has_docid, k, str(document_id)),
+                                     ASYNC_S3_CONCURRENCY)
+            keys = [k for k, hit in zip(keys, hits) if hit]
+            if not keys:
+                logger.info(f"No S3 objects found for deleted doc {document_id} (project {project_id})")
+                return proc.success_response({"status": "not_found", "projectId": project_id, "documentId": document_id})
+
+            async def delete(k: str) -> Optional[str]:
+                try:
+                    await self._s3(proc._s3_call, "delete_object", Bucket=proc.bucket, Key=k)
+                    logger.info(f"Deleted S3 object: s3://{proc.bucket}/{k}")
+                    return k
+                except Exception as e:
+                    logger.error(f"Failed to delete {k}: {e}")
+                    return None
+
+            deleted = [k for k in await self._drain(keys, delete, ASYNC_S3_CONCURRENCY) if k]
+            return proc.success_response({"status": "deleted", "projectId": project_id, "documentId": document_id, "deletedKeys": deleted})
+        except DeadlineExceeded:
+            raise  # lambda_handler re-queues the event
+        except Exception as e:
+            logger.error(f"Document delete handler failed: {e}")
+            return proc.error_response(500, "Internal server error")
@@ -1,9 +1,15 @@
+import base64
 import hashlib
+import json
 import requests
 import logging
 import os
+import threading
+import time
 from datetime import datetime, timezone
+from typing import Optional
 from dotenv import load_dotenv
+from file_lock import FileLock, atomic_write
 # === CONFIGURATION ===
 load_dotenv()
 
@@ -12,6 +18,13 @@ API_SECRET = os.getenv("API_SECRET")
 USER_ID = os.getenv("USER_ID")
 ORG_ID = os.getenv("ORG_ID")
 SESSION_URL = os.getenv("SESSION_URL")
+
+# Token cache: reuse the access token until this many seconds before it expires.
+TOKEN_REFRESH_SKEW = int(os.getenv("FV_TOKEN_REFRESH_SKEW", "60"))
+# Used when /session does not tell us when the token expires.
+TOKEN_DEFAULT_TTL  = int(os.getenv("FV_TOKEN_TTL_SECONDS", "900"))
+# Optional on-disk token store shared by short-lived CLI processes (e.g. C:/temp/fv_token.json)
+TOKEN_STORE_PATH   = os.getenv("FV_TOKEN_STORE", "").strip()
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 
@@ -19,6 +32,37 @@ def compute_md5_hash(data: str) -> str:
     """Compute MD5 hash used for Filevine partner auth."""
     return hashlib.md5(data.encode("utf-8")).hexdigest()
 
+def _parse_expiry(value) -> Optional[float]:
+    """Accept epoch seconds/millis or an ISO-8601 string; return epoch seconds."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) / 1000.0 if value > 1e11 else float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """Read the `exp` claim of a JWT access token without verifying it."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return _parse_expiry(json.loads(base64.urlsafe_b64decode(payload)).get("exp"))
+    except Exception:
+        return None
+
+def _token_expiry(data: dict) -> float:
+    """Best-effort absolute expiry for a /session response."""
+    expires_at = _parse_expiry(data.get("accessTokenExpiry"))
+    if expires_at is None and data.get("expiresIn"):
+        expires_at = time.time() + float(data["expiresIn"])
+    if expires_at is None:
+        expires_at = _jwt_expiry(data.get("accessToken") or "")
+    if expires_at is None:
+        expires_at = time.time() + TOKEN_DEFAULT_TTL
+    return expires_at
+
 def refresh_access_token() -> dict:
     """Request a new access token and session from Filevine."""
     api_timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
@@ -43,15 +87,93 @@ def refresh_access_token() -> dict:
         return {
             "access_token": data["accessToken"],
             "session_id": data["refreshToken"],  # ✅ This is used as x-fv-sessionid
-            "user_id": data["userId"]
+            "user_id": data["userId"],
+            "expires_at": _token_expiry(data)
         }
     except requests.exceptions.RequestException as e:
         logging.error(f"❌ Auth failed: {e}")
         raise
 
-def get_dynamic_headers() -> dict:
-    """Return headers with a fresh Filevine token and session."""
-    auth = refresh_access_token()
+# ---------- cross-process token store ----------
+def _store_identity() -> str:
+    """Tokens are only shared between processes using the same credentials."""
+    return hashlib.sha256(f"{API_KEY}|{USER_ID}|{ORG_ID}|{SESSION_URL}".encode("utf-8")).hexdigest()
+
+def _read_token_store() -> Optional[dict]:
+    try:
+        with open(TOKEN_STORE_PATH, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("identity") != _store_identity():
+        return None
+    return data.get("auth")
+
+def _write_token_store(auth: dict) -> None:
+    try:
+        body = json.dumps({"identity": _store_identity(), "auth": auth}).encode("utf-8")
+        atomic_write(TOKEN_STORE_PATH, body)
+    except OSError as e:
+        logging.warning(f"Could not write token store {TOKEN_STORE_PATH}: {e}")
+
+def _refresh_via_store(stale_token: Optional[str]) -> dict:
+    """
+    Refresh under an exclusive file lock so concurrent CLI runs on one host
+    share a single /session call. A stored token is reused while it is fresh,
+    unless it is the very token the caller wants replaced.
+    """
+    with FileLock(f"{TOKEN_STORE_PATH}.lock"):
+        stored = _read_token_store()
+        if _is_fresh(stored) and stored.get("access_token") != stale_token:
+            logging.info("Reusing Filevine token from token store.")
+            return stored
+        auth = refresh_access_token()
+        _write_token_store(auth)
+        return auth
+
+# ---------- process-wide token cache ----------
+_token_lock = threading.Lock()
+_cached_auth: Optional[dict] = None
+_invalidated_token: Optional[str] = None  # last token dropped after a 401 (kept out of the store)
+
+def _is_fresh(auth: Optional[dict]) -> bool:
+    return bool(auth) and auth.get("expires_at", 0) - TOKEN_REFRESH_SKEW > time.time()
+
+def get_access_token(force_refresh: bool = False) -> dict:
+    """
+    Return a cached token, refreshing it shortly before expiry.
+    Single-flight: concurrent callers wait on the lock and reuse the one refresh.
+    """
+    global _cached_auth
+    auth = _cached_auth
+    if not force_refresh and _is_fresh(auth):
+        return auth
+    with _token_lock:
+        # Another thread may have refreshed while we waited.
+        if _cached_auth is not auth and _is_fresh(_cached_auth):
+            return _cached_auth
+        if TOKEN_STORE_PATH:
+            stale = (auth or {}).get("access_token") or _invalidated_token
+            _cached_auth = _refresh_via_store(stale)
+        else:
+            _cached_auth = refresh_access_token()
+        return _cached_auth
+
+def invalidate_token_cache(access_token: Optional[str] = None) -> None:
+    """
+    Drop the cached token (e.g. after a 401).
+    If `access_token` is given, only drop it when it is still the cached one,
+    so a burst of 401s for the same stale token triggers a single refresh.
+    """
+    global _cached_auth, _invalidated_token
+    with _token_lock:
+        if access_token is None or (_cached_auth or {}).get("access_token") == access_token:
+            _invalidated_token = access_token or (_cached_auth or {}).get("access_token")
+            _cached_auth = None
+
+def get_dynamic_headers(force_refresh: bool = False) -> dict:
+    """Return Filevine headers, reusing the cached token while it is valid."""
+    auth = get_access_token(force_refresh)
     return {
         "Authorization": f"Bearer {auth['access_token']}",
         "x-fv-userid": str(auth["user_id"]),
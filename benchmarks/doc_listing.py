@@ -0,0 +1,92 @@
+"""
+Wall-clock time to list a project's documents one page at a time versus with
+FV_LIST_PREFETCH pages requested ahead.
+
+    python benchmarks/doc_listing.py [--docs 50000] [--latency 0.15] [--window 8]
+
+Filevine is simulated by a transport adapter with a fixed per-request latency,
+so the numbers show request scheduling, not network variance. The rate limiter
+is lifted to 1000 rps unless FV_RATE_LIMIT_RPS is set; with the default 8 rps
+the limiter, not latency, bounds both runs:
+
+    FV_RATE_LIMIT_RPS=8 FV_RATE_LIMIT_BURST=10 python benchmarks/doc_listing.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FV_RATE_LIMIT_RPS", "1000")
+os.environ.setdefault("FV_RATE_LIMIT_BURST", "1000")
+os.environ.setdefault("FV_HTTP_CACHE", "false")
+
+import requests  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+from urllib.parse import urlparse, parse_qs  # noqa: E402
+
+import utils  # noqa: E402
+
+
+class FakeFilevine(BaseAdapter):
+    """Serves /core/documents?projectId=..&offset=..&limit=.. for a synthetic project."""
+    def __init__(self, docs: int, latency: float):
+        super().__init__()
+        self.docs = docs
+        self.latency = latency
+        self.calls = 0
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        q = {k: v[0] for k, v in parse_qs(urlparse(request.url).query).items()}
+        off, lim = int(q.get("offset", 0)), int(q.get("limit", 200))
+        items = [{
+            "documentId": {"native": 10_000 + i},
+            "filename": f"document-{i}.pdf",
+            "size": 1024 + i,
+            "folderId": {"native": 100 + i % 250},
+            "folderName": f"Folder {i % 250}",
+            "uploadDate": "2024-05-01T12:00:00Z",
+        } for i in range(off, min(off + lim, self.docs))]
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps({"items": items, "hasMore": off + lim < self.docs}).encode("utf-8")
+        r.headers["Content-Type"] = "application/json"
+        r.url = request.url
+        r.request = request
+        return r
+
+    def close(self):
+        pass
+
+
+def run(window: int, args) -> tuple:
+    utils.LIST_PREFETCH = window
+    proc = utils.DocumentProcessor()
+    fake = FakeFilevine(args.docs, args.latency)
+    proc.http.mount("https://", fake)
+    t0 = time.perf_counter()
+    docs = proc.fetch_all_documents(1, {"Authorization": "Bearer x"})
+    return [d["id"] for d in docs], time.perf_counter() - t0, fake.calls
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=50_000)
+    ap.add_argument("--latency", type=float, default=0.15)
+    ap.add_argument("--window", type=int, default=8)
+    args = ap.parse_args()
+
+    utils.logger.setLevel("WARNING")
+    base_ids, base_t, base_calls = run(1, args)
+    ids, t, calls = run(args.window, args)
+    assert ids == base_ids, "prefetching listing returned different documents"
+    print(f"{args.docs} documents, {args.latency * 1000:.0f} ms/request, rate limit {os.environ['FV_RATE_LIMIT_RPS']} rps")
+    print(f"one page at a time    {base_t:6.2f} s  ({base_calls} requests)")
+    print(f"prefetch window {args.window:<3}   {t:6.2f} s  ({calls} requests)  speedup x{base_t / t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Memory held by a project's document list after path mapping: the old per-doc
+dicts (picked dict, then a dict(d) copy with 'folder_path') versus DocRecords
+pointing at a shared path table.
+
+    python benchmarks/doc_records.py [--docs 100000] [--folders 2500]
+
+Listing pages are decoded one at a time, as in a sync, so the numbers are the
+records the sync keeps, not the raw JSON.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FV_HTTP_CACHE", "false")
+
+from fast_json import loads  # noqa: E402
+from utils import DocumentProcessor  # noqa: E402
+
+PAGE = 200
+
+
+def make_pages(docs: int, folders: int):
+    for off in range(0, docs, PAGE):
+        items = [{
+            "documentId": {"native": 10_000 + i},
+            "filename": f"Deposition transcript {i} - final.pdf",
+            "size": 1024 + i,
+            "folderId": {"native": 100 + i % folders},
+            "folderName": f"Subfolder {i % folders}",
+            "uploadDate": "2024-05-01T12:00:00Z",
+            "modifiedDate": f"2024-05-{1 + i % 28:02d}T12:00:00Z",
+        } for i in range(off, min(off + PAGE, docs))]
+        yield json.dumps({"items": items, "hasMore": off + PAGE < docs}).encode("utf-8")
+
+
+def folder_map_for(folders: int) -> dict:
+    return {100 + f: f"Clients/Matter {f // 50:03d}/Discovery/Responses/Subfolder {f}" for f in range(folders)}
+
+
+def legacy(proc, pages, folder_map):
+    """Shape before DocRecord: dict per doc, copied again to add folder_path."""
+    docs = []
+    for body in pages:
+        for d in loads(body)["items"]:
+            doc_id = (d.get("documentId") or {}).get("native")
+            docs.append({
+                "id": int(doc_id),
+                "filename": proc.sanitize(d.get("filename", "unnamed")),
+                "size": d.get("size", 0),
+                "folder_id": (d.get("folderId") or {}).get("native"),
+                "folder_name": d.get("folderName"),
+                "modified": d.get("modifiedDate") or d.get("uploadDate"),
+            })
+    out = []
+    for d in docs:
+        path = folder_map.get(int(d["folder_id"])) or proc.sanitize(d.get("folder_name") or "Documents")
+        d2 = dict(d)
+        d2["folder_path"] = path
+        out.append(d2)
+    return out
+
+
+def records(proc, pages, folder_map):
+    docs = []
+    for body in pages:
+        docs.extend(p for p in map(proc._pick_document, loads(body)["items"]) if p is not None)
+    return proc._map_doc_paths(folder_map, docs, headers={})
+
+
+def measure(fn, proc, args):
+    folder_map = folder_map_for(args.folders)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    docs = fn(proc, make_pages(args.docs, args.folders), folder_map)
+    elapsed = time.perf_counter() - t0
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    sample = [(d["id"], d["filename"], d["folder_path"]) for d in docs[:: max(1, args.docs // 1000)]]
+    return held, peak, elapsed, sample
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=100_000)
+    ap.add_argument("--folders", type=int, default=2_500)
+    args = ap.parse_args()
+
+    proc = DocumentProcessor()
+    old_held, old_peak, old_t, old_sample = measure(legacy, proc, args)
+    new_held, new_peak, new_t, new_sample = measure(records, proc, args)
+    assert old_sample == new_sample, "DocRecords resolved different fields/paths"
+    mib = 1024 * 1024
+    print(f"{args.docs} documents in {args.folders} folders")
+    print(f"dicts + dict(d) copy  held {old_held / mib:7.1f} MiB  peak {old_peak / mib:7.1f} MiB  {old_t:5.2f} s")
+    print(f"DocRecord + DocPaths  held {new_held / mib:7.1f} MiB  peak {new_peak / mib:7.1f} MiB  {new_t:5.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Wall-clock time to map a project's folder tree, one folder at a time versus
+level-by-level with FV_CRAWL_CONCURRENCY listings in flight.
+
+    python benchmarks/folder_crawl.py [--folders 400] [--fanout 5] [--latency 0.08]
+
+Filevine is simulated by a transport adapter with a fixed per-request latency,
+so the numbers show request scheduling, not network variance. The rate limiter
+is lifted to 1000 rps unless FV_RATE_LIMIT_RPS is set; with the default 8 rps
+the limiter, not latency, bounds both runs:
+
+    FV_RATE_LIMIT_RPS=8 FV_RATE_LIMIT_BURST=10 python benchmarks/folder_crawl.py
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("FV_RATE_LIMIT_RPS", "1000")
+os.environ.setdefault("FV_RATE_LIMIT_BURST", "1000")
+os.environ.setdefault("FV_HTTP_CACHE", "false")
+
+import requests  # noqa: E402
+from requests.adapters import BaseAdapter  # noqa: E402
+from urllib.parse import urlparse, parse_qs  # noqa: E402
+
+import utils  # noqa: E402
+
+
+class FakeFilevine(BaseAdapter):
+    """Serves /core/folders, /core/folders/{id} and /core/folders/{id}/children for a synthetic tree."""
+    def __init__(self, folders: int, fanout: int, latency: float):
+        super().__init__()
+        self.latency = latency
+        self.calls = 0
+        self.tree = {1: ("Root", None)}
+        queue, nid = [1], 2
+        while nid <= folders:
+            parent = queue.pop(0)
+            for _ in range(fanout):
+                if nid > folders:
+                    break
+                self.tree[nid] = (f"Folder {nid}", parent)
+                queue.append(nid)
+                nid += 1
+
+    def send(self, request, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        u = urlparse(request.url)
+        q = {k: v[0] for k, v in parse_qs(u.query).items()}
+        parts = u.path.strip("/").split("/")
+        if parts == ["core", "folders"]:
+            body = {"items": [{"folderId": {"native": 1}, "name": "Root"}], "hasMore": False}
+        elif len(parts) == 4 and parts[3] == "children":
+            fid, off, lim = int(parts[2]), int(q.get("offset", 0)), int(q.get("limit", 500))
+            kids = [{"folderId": {"native": c}, "name": n} for c, (n, p) in self.tree.items() if p == fid]
+            body = {"items": kids[off:off + lim], "hasMore": off + lim < len(kids)}
+        else:
+            fid = int(parts[2])
+            name, parent = self.tree[fid]
+            body = {"folderId": {"native": fid}, "name": name}
+            if parent:
+                body["parentId"] = {"native": parent}
+        r = requests.Response()
+        r.status_code = 200
+        r._content = json.dumps(body).encode("utf-8")
+        r.headers["Content-Type"] = "application/json"
+        r.url = request.url
+        r.request = request
+        return r
+
+    def close(self):
+        pass
+
+
+def run(workers: int, args) -> tuple:
+    utils.CRAWL_CONCURRENCY = workers
+    proc = utils.DocumentProcessor()
+    fake = FakeFilevine(args.folders, args.fanout, args.latency)
+    proc.http.mount("https://", fake)
+    t0 = time.perf_counter()
+    folder_map = proc.fetch_complete_folder_structure(1, {"Authorization": "Bearer x"})
+    return folder_map, time.perf_counter() - t0, fake.calls
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--folders", type=int, default=400)
+    ap.add_argument("--fanout", type=int, default=5)
+    ap.add_argument("--latency", type=float, default=0.08)
+    ap.add_argument("--workers", type=int, default=utils.CRAWL_CONCURRENCY)
+    args = ap.parse_args()
+
+    utils.logger.setLevel("WARNING")
+    base_map, base_t, base_calls = run(1, args)
+    map_, t, calls = run(args.workers, args)
+    assert map_ == base_map, "concurrent crawl produced a different folder map"
+    print(f"{args.folders} folders, fanout {args.fanout}, {args.latency * 1000:.0f} ms/request, rate limit {os.environ['FV_RATE_LIMIT_RPS']} rps")
+    print(f"sequential            {base_t:6.2f} s  ({base_calls} requests)")
+    print(f"concurrent x{args.workers:<3}       {t:6.2f} s  ({calls} requests)  speedup x{base_t / t:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Decode cost of /core/documents listing pages: the old r.json() path vs the
+fast_json decoders.
+
+    python benchmarks/json_decode.py [--docs 50000] [--page 200] [--repeat 3]
+
+Prints wall time per full listing and peak memory per page (tracemalloc).
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests  # noqa: E402
+
+import fast_json  # noqa: E402
+from utils import DocumentProcessor  # noqa: E402
+
+
+def make_page(offset: int, size: int, total: int) -> bytes:
+    """A listing page shaped like Filevine's, including the fields a sync ignores."""
+    items = []
+    for i in range(offset, min(offset + size, total)):
+        items.append({
+            "documentId": {"native": 900000 + i, "partner": None},
+            "projectId": {"native": 2370300, "partner": None},
+            "folderId": {"native": 54000000 + i % 400, "partner": None},
+            "folderName": f"Folder {i % 400}",
+            "filename": f"Deposition transcript {i} - final (redline).pdf",
+            "size": 1024 * (i % 5000 + 1),
+            "uploadDate": "2025-03-14T12:34:56.789Z",
+            "modifiedDate": "2025-06-01T08:00:00.000Z",
+            "uploaderFullname": "Jane Q. Paralegal",
+            "uploaderId": {"native": 1234, "partner": None},
+            "hashtags": ["#discovery", "#depo"],
+            "description": "Imported from scanner batch 42; OCR complete.",
+            "isLocked": False,
+            "links": {"self": f"/core/documents/{900000 + i}",
+                      "project": "/core/projects/2370300",
+                      "folder": f"/core/folders/{54000000 + i % 400}"},
+        })
+    return json.dumps({"items": items, "count": len(items), "offset": offset, "limit": size,
+                       "hasMore": offset + size < total, "links": {}}).encode("utf-8")
+
+
+def as_response(body: bytes) -> requests.Response:
+    r = requests.Response()
+    r.status_code = 200
+    r._content = body
+    r.headers["Content-Type"] = "application/json"  # no charset, as Filevine sends it
+    return r
+
+
+def old_path(body: bytes, pick):
+    data = as_response(body).json()
+    return [p for p in map(pick, data.get("items", [])) if p is not None], bool(data.get("hasMore", False))
+
+
+def stdlib_path(body: bytes, pick):
+    data = json.loads(body)
+    return [p for p in map(pick, data.get("items", [])) if p is not None], bool(data.get("hasMore", False))
+
+
+def orjson_path(body: bytes, pick):
+    data = fast_json.orjson.loads(body)
+    return [p for p in map(pick, data.get("items", [])) if p is not None], bool(data.get("hasMore", False))
+
+
+def stream_path(body: bytes, pick):
+    picked, meta = fast_json.stream_listing(body, pick)
+    return picked, bool(meta.get("hasMore", False))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--docs", type=int, default=50000)
+    ap.add_argument("--page", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    pages = [make_page(o, args.page, args.docs) for o in range(0, args.docs, args.page)]
+    pick = DocumentProcessor()._pick_document
+    paths = [("r.json() (before)", old_path), ("json.loads(bytes)", stdlib_path)]
+    if fast_json.orjson is not None:
+        paths.append(("orjson", orjson_path))
+    paths.append(("stream_listing", stream_path))
+
+    print(f"{len(pages)} pages, {args.docs} documents, {sum(map(len, pages)) / 1e6:.1f} MB of JSON")
+    baseline = None
+    expected = None
+    for name, fn in paths:
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            out = [fn(p, pick) for p in pages]
+            best = min(best, time.perf_counter() - t0)
+        docs = [d for picked, _ in out for d in picked]
+        expected = expected or docs
+        assert docs == expected, f"{name} decoded different documents"
+
+        tracemalloc.start()
+        fn(pages[0], pick)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        baseline = baseline or best
+        print(f"{name:<20} {best * 1000:8.1f} ms   x{baseline / best:4.2f}   peak/page {peak / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
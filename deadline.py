@@ -0,0 +1,65 @@
+# === deadline.py ===
+import os
+import time
+from typing import Optional, Tuple, Union
+
+# Time kept back from Lambda's own limit for logging, re-queueing and returning
+DEADLINE_SAFETY_SECONDS = float(os.getenv("FV_DEADLINE_SAFETY_MS", "3000")) / 1000.0
+# Part of that margin still kept back while saving state after the work deadline (folder maps)
+FLUSH_SAFETY_SECONDS    = float(os.getenv("FV_DEADLINE_FLUSH_SAFETY_MS", "500")) / 1000.0
+# Don't start a request with less time than this left
+MIN_REQUEST_SECONDS     = float(os.getenv("FV_MIN_REQUEST_SECONDS", "1.0"))
+
+Timeout = Union[float, Tuple[float, float], None]
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting work that cannot finish before the invocation is killed."""
+
+
+class Deadline:
+    """
+    Absolute end time for one invocation (monotonic clock); expires_at=None means unbounded.
+    - timeout(t): shrink a requests timeout to the time left (raises if too little is left)
+    - allows(seconds): can we sleep this long and still make one more request?
+    """
+    def __init__(self, expires_at: Optional[float] = None):
+        self.expires_at = expires_at
+
+    @classmethod
+    def from_context(cls, context, safety: float = DEADLINE_SAFETY_SECONDS) -> "Deadline":
+        """From a Lambda context; contexts without get_remaining_time_in_millis give an unbounded deadline."""
+        get_ms = getattr(context, "get_remaining_time_in_millis", None)
+        if not callable(get_ms):
+            return cls(None)
+        return cls(time.monotonic() + get_ms() / 1000.0 - safety)
+
+    def remaining(self) -> float:
+        if self.expires_at is None:
+            return float("inf")
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        """Too little time left to start another request."""
+        return self.remaining() < MIN_REQUEST_SECONDS
+
+    def check(self, what: str = "work") -> None:
+        if self.expired():
+            raise DeadlineExceeded(f"deadline reached before {what} ({self.remaining():.2f}s left)")
+
+    def allows(self, seconds: float) -> bool:
+        return self.remaining() >= seconds + MIN_REQUEST_SECONDS
+
+    def timeout(self, requested: Timeout, what: str = "request") -> Timeout:
+        """Clamp a float or (connect, read) timeout to the remaining time."""
+        if self.expires_at is None:
+            return requested
+        self.check(what)
+        left = self.remaining()
+        if requested is None:
+            return left
+        if isinstance(requested, tuple):
+            connect, read = requested
+            return (min(connect, left), min(read, left))
+        return min(requested, left)
+
@@ -0,0 +1,91 @@
+# === doc_record.py ===
+import sys
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DOC_FIELDS = ("id", "filename", "size", "folder_id", "folder_name", "modified")
+
+
+class DocPaths:
+    """
+    Shared folderId -> path table for one sync's documents.
+    `folder_map` (the BFS result) is referenced, not copied; paths learned later
+    (parent climbs, folderName fallbacks) go into `extra`. Documents without a
+    folderId get `fallback(folder_name)`.
+    """
+    def __init__(self, folder_map: Dict[int, str], fallback: Callable[[Optional[str]], str]):
+        self.folder_map = folder_map
+        self.extra: Dict[int, str] = {}
+        self.fallback = fallback
+
+    def known(self, folder_id) -> bool:
+        fid = int(folder_id)
+        return bool(self.folder_map.get(fid) or self.extra.get(fid))
+
+    def add(self, folder_id, path: str) -> None:
+        self.extra[int(folder_id)] = path
+
+    def path(self, folder_id, folder_name: Optional[str]) -> str:
+        if folder_id:
+            fid = int(folder_id)
+            found = self.folder_map.get(fid) or self.extra.get(fid)
+            if found:
+                return found
+        return self.fallback(folder_name)
+
+
+class DocRecord:
+    """
+    One /core/documents item with only the fields a sync uses, in slots (no per-record
+    dict). The folder path is not stored: `folder_path` looks the folderId up in the
+    DocPaths table attached by path mapping. Reads like the dict it replaces:
+    d["id"], d.get("folder_id"), "folder_path" in d, dict(d).
+    """
+    __slots__ = DOC_FIELDS + ("paths",)
+
+    def __init__(self, id: int, filename: str, size: int, folder_id: Optional[int],
+                 folder_name: Optional[str], modified: Optional[str], paths: Optional[DocPaths] = None):
+        self.id          = id
+        self.filename    = filename
+        self.size        = size
+        self.folder_id   = folder_id
+        self.folder_name = sys.intern(folder_name) if folder_name else folder_name  # shared by a folder's docs
+        self.modified    = modified
+        self.paths       = paths
+
+    @property
+    def folder_path(self) -> str:
+        if self.paths is None:
+            raise AttributeError("folder_path is available once the document has been path-mapped")
+        return self.paths.path(self.folder_id, self.folder_name)
+
+    # ---- dict-style access ----
+    def keys(self) -> Tuple[str, ...]:
+        return DOC_FIELDS + ("folder_path",) if self.paths is not None else DOC_FIELDS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.keys())
+
+    def __contains__(self, key) -> bool:
+        return key in self.keys()
+
+    def __getitem__(self, key: str):
+        if key not in self.keys():
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self) -> List[Tuple[str, object]]:
+        return [(k, self[k]) for k in self.keys()]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (DocRecord, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"DocRecord({dict(self.items())!r})"
@@ -0,0 +1,108 @@
+# === fast_json.py ===
+import os
+import json
+from typing import Callable, List, Optional, Tuple, TypeVar, Union
+
+try:  # optional: 3-5x faster than the stdlib decoder on listing pages
+    import orjson
+except ImportError:  # pragma: no cover - depends on the deployment package
+    orjson = None
+
+# auto   -> orjson if installed, else stdlib json on the raw bytes
+# orjson / stdlib -> force a decoder; stream -> incremental item parser (lowest peak memory)
+FV_JSON_MODE = os.getenv("FV_JSON_MODE", "auto").strip().lower()
+
+T = TypeVar("T")
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+
+
+def loads(data: Union[bytes, str]):
+    """Decode a JSON document with the fastest available decoder."""
+    if orjson is not None and FV_JSON_MODE in ("auto", "orjson", "stream"):
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def response_json(r):
+    """
+    r.json() without requests' overhead: decode r.content directly
+    (no charset sniffing when the server omits one).
+    """
+    return loads(r.content)
+
+
+def _skip_ws(s: str, i: int) -> int:
+    while i < len(s) and s[i] in _WS:
+        i += 1
+    return i
+
+
+def _expect(s: str, i: int, ch: str) -> int:
+    i = _skip_ws(s, i)
+    if i >= len(s) or s[i] != ch:
+        raise ValueError(f"expected {ch!r} at offset {i}")
+    return i + 1
+
+
+def stream_listing(data: Union[bytes, str], pick: Callable[[dict], Optional[T]],
+                   items_key: str = "items") -> Tuple[List[T], dict]:
+    """
+    Walk a listing page ({"items": [...], "hasMore": ...}) one item at a time,
+    keeping only pick(item) (None is dropped). Each item dict is released as soon
+    as it has been picked, so the whole decoded page never exists at once.
+    Returns (picked, other top-level fields).
+    """
+    s = data.decode("utf-8") if isinstance(data, (bytes, bytearray)) else data
+    out: List[T] = []
+    meta: dict = {}
+    i = _expect(s, 0, "{")
+    i = _skip_ws(s, i)
+    if i < len(s) and s[i] == "}":
+        return out, meta
+    while True:
+        key, i = _decoder.raw_decode(s, _skip_ws(s, i))
+        i = _expect(s, i, ":")
+        i = _skip_ws(s, i)
+        if key == items_key and s.startswith("[", i):
+            i = _skip_ws(s, i + 1)
+            if s.startswith("]", i):
+                i += 1
+            else:
+                while True:
+                    item, i = _decoder.raw_decode(s, _skip_ws(s, i))
+                    picked = pick(item)
+                    if picked is not None:
+                        out.append(picked)
+                    i = _skip_ws(s, i)
+                    if s.startswith(",", i):
+                        i += 1
+                        continue
+                    i = _expect(s, i, "]")
+                    break
+        else:
+            meta[key], i = _decoder.raw_decode(s, i)
+        i = _skip_ws(s, i)
+        if s.startswith(",", i):
+            i += 1
+            continue
+        _expect(s, i, "}")
+        return out, meta
+
+
+def parse_listing(data: Union[bytes, str], pick: Callable[[dict], Optional[T]],
+                  items_key: str = "items") -> Tuple[List[T], bool]:
+    """
+    Decode one listing page into ([pick(item) for item in items if not None], hasMore)
+    using the decoder selected by FV_JSON_MODE.
+    """
+    if FV_JSON_MODE == "stream":
+        picked, meta = stream_listing(data, pick, items_key)
+        return picked, bool(meta.get("hasMore", False))
+    if FV_JSON_MODE == "stdlib" or orjson is None:
+        payload = json.loads(data)
+    else:
+        payload = orjson.loads(data)
+    picked = [p for p in map(pick, payload.get(items_key) or []) if p is not None]
+    return picked, bool(payload.get("hasMore", False))
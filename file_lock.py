@@ -0,0 +1,73 @@
+# === file_lock.py ===
+import os
+import time
+
+try:  # POSIX
+    import fcntl
+except ImportError:  # Windows (the PowerShell watcher host)
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Exclusive, cross-process lock on a sidecar file.
+    Works on Linux (fcntl) and Windows (msvcrt). Usage:
+
+        with FileLock("C:/temp/fv_token.json.lock"):
+            ...
+    """
+    def __init__(self, path: str, timeout: float = 30.0, poll: float = 0.05):
+        self.path    = path
+        self.timeout = timeout
+        self.poll    = poll
+        self._fh     = None
+
+    def acquire(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        fh = open(self.path, "a+b")
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    fh.seek(0)
+                    msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+                self._fh = fh
+                return
+            except OSError:
+                if time.monotonic() >= deadline:
+                    fh.close()
+                    raise TimeoutError(f"Timed out waiting for lock {self.path}")
+                time.sleep(self.poll)
+
+    def release(self) -> None:
+        fh, self._fh = self._fh, None
+        if fh is None:
+            return
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            fh.close()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+def atomic_write(path: str, data: bytes, mode: int = 0o600) -> None:
+    """Write via temp file + rename so readers never see a half-written file."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
@@ -0,0 +1,344 @@
+# === folder_store.py ===
+import os
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from folder_tree import FolderTree
+from http_cache import DiskStore, S3Store
+
+logger = logging.getLogger(__name__)
+
+# Durable per-project folder map: "s3" (sync bucket), "file" (FV_FOLDER_MAP_DIR) or "off"
+FOLDER_MAP_STORE      = os.getenv("FV_FOLDER_MAP_STORE", "s3").strip().lower()
+FOLDER_MAP_DIR        = os.getenv("FV_FOLDER_MAP_DIR", "").strip()
+# Outside S3_PREFIX so the Z: drive mirror never sees it
+FOLDER_MAP_S3_PREFIX  = os.getenv("FV_FOLDER_MAP_S3_PREFIX", "_sync_cache/folders/")
+# A sync re-crawls the whole tree when the stored map is older than this (seconds)
+FOLDER_MAP_REVALIDATE = int(os.getenv("FV_FOLDER_MAP_REVALIDATE", "21600"))
+# Folder invalidations stay in the stored map this long, so another container's save can't undo them
+FOLDER_TOMBSTONE_TTL  = int(os.getenv("FV_FOLDER_TOMBSTONE_TTL", str(FOLDER_MAP_REVALIDATE)))
+# In-memory bound for long-lived processes: least recently used projects are evicted
+# once the cached maps hold more than this many folders (or projects) in total
+FOLDER_CACHE_MAX_FOLDERS  = int(os.getenv("FV_FOLDER_CACHE_MAX_FOLDERS", "200000"))
+FOLDER_CACHE_MAX_PROJECTS = int(os.getenv("FV_FOLDER_CACHE_MAX_PROJECTS", "64"))
+
+FOLDER_MAP_VERSION = 1
+
+
+class ProjectFolderMap(FolderTree):
+    """
+    FolderTree for one project plus what persisting it needs: when it was last
+    fully crawled, whether it changed since it was loaded/saved, and what changed
+    (folders learned and subtrees invalidated here, with times), so a save can
+    merge into the stored map instead of overwriting other containers' updates.
+    A folder whose chain leaves the map has no path here (callers fall back to the API).
+    """
+    def __init__(self, project_id: int, folders: Optional[Dict[int, Tuple[str, Optional[int]]]] = None,
+                 roots: Optional[Dict[int, str]] = None, crawled_at: float = 0.0,
+                 tombstones: Optional[Dict[int, float]] = None):
+        super().__init__(folders, roots)
+        self.project_id = project_id
+        self.crawled_at = crawled_at       # last full crawl (unix time); 0 = never
+        self.dirty      = False
+        self.learned: Dict[int, float] = {}                        # folderId -> when added/changed here
+        self.tombstones: Dict[int, float] = dict(tombstones or {})  # folderId -> when its subtree was dropped
+        self.new_tombstones: Dict[int, float] = {}                 # the ones dropped here, not yet saved
+
+    def needs_full_refresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) - self.crawled_at > FOLDER_MAP_REVALIDATE
+
+    # ---- updates (mark dirty) ----
+    def add(self, folder_id: int, name: str, parent_id: Optional[int]) -> bool:
+        with self._lock:
+            changed = super().add(folder_id, name, parent_id)
+            if changed:
+                self.learned[int(folder_id)] = time.time()
+                self.dirty = True
+            return changed
+
+    def set_root(self, folder_id: int, path: str) -> bool:
+        with self._lock:
+            changed = super().set_root(folder_id, path)
+            if changed:
+                self.learned[int(folder_id)] = time.time()
+                self.dirty = True
+            return changed
+
+    def remove_subtree(self, folder_id: int) -> List[int]:
+        with self._lock:
+            removed = super().remove_subtree(folder_id)
+            now = time.time()
+            self.tombstones[int(folder_id)] = self.new_tombstones[int(folder_id)] = now
+            for fid in removed:
+                self.learned.pop(fid, None)
+            self.dirty = True
+            return removed
+
+    # ---- merge with the stored map ----
+    def merged_record(self, stored: Optional["ProjectFolderMap"], now: Optional[float] = None) -> dict:
+        """
+        Record to write in place of `stored` (the map in the store right now):
+        - if our full crawl is newer than the stored one, our folders replace the stored ones;
+          otherwise only folders learned here are laid over the stored map
+        - our folders learned before a tombstone (ours or another container's) covering them are
+          dropped, so a save never brings back an invalidated subtree
+        - our new tombstones also drop the stored folders below them
+        Tombstones are kept for FOLDER_TOMBSTONE_TTL.
+        """
+        now = now or time.time()
+        stored = stored or ProjectFolderMap(self.project_id)
+        with self._lock:
+            tombstones = dict(stored.tombstones)
+            for fid, ts in self.tombstones.items():
+                tombstones[fid] = max(ts, tombstones.get(fid, 0.0))
+
+            if self.crawled_at > stored.crawled_at:
+                folders, roots = {}, {}
+                ours = set(self.folders) | set(self.roots)
+            else:
+                folders, roots = dict(stored.folders), dict(stored.roots)
+                ours = set(self.learned)
+
+            # Subtrees are taken over everything either side knows
+            below: Dict[int, List[int]] = {}
+            for source in (stored.folders, self.folders):
+                for fid, (_, parent) in source.items():
+                    if parent is not None:
+                        below.setdefault(parent, []).append(fid)
+            covered: Dict[int, float] = {}   # folderId -> newest tombstone above it
+            for top, ts in tombstones.items():
+                stack, seen = [top], set()
+                while stack:
+                    fid = stack.pop()
+                    if fid in seen:
+                        continue
+                    seen.add(fid)
+                    covered[fid] = max(ts, covered.get(fid, 0.0))
+                    if top in self.new_tombstones:
+                        folders.pop(fid, None)
+                        roots.pop(fid, None)
+                    stack.extend(below.get(fid, []))
+
+            for fid in ours:
+                if fid in covered and self.learned.get(fid, 0.0) < covered[fid]:
+                    continue  # learned before the subtree was invalidated
+                if fid in self.folders:
+                    folders[fid] = self.folders[fid]
+                if fid in self.roots:
+                    roots[fid] = self.roots[fid]
+
+            crawled_at = max(self.crawled_at, stored.crawled_at)
+            live = {fid: ts for fid, ts in tombstones.items() if ts >= now - FOLDER_TOMBSTONE_TTL}
+            return self._record(folders, roots, crawled_at, live, now)
+
+    def saved(self, record: dict) -> None:
+        """Adopt what was written (other containers' folders and invalidations included)."""
+        merged = ProjectFolderMap.from_record(self.project_id, record)
+        with self._lock:
+            self.folders, self.roots = merged.folders, merged.roots
+            self._children, self._tops = merged._children, merged._tops
+            self.crawled_at = merged.crawled_at
+            self.tombstones = merged.tombstones
+            self.learned.clear()
+            self.new_tombstones.clear()
+            self.dirty = False
+
+    # ---- persistence ----
+    def to_record(self) -> dict:
+        with self._lock:
+            return self._record(self.folders, self.roots, self.crawled_at, self.tombstones, time.time())
+
+    def _record(self, folders: Dict[int, Tuple[str, Optional[int]]], roots: Dict[int, str],
+                crawled_at: float, tombstones: Dict[int, float], saved_at: float) -> dict:
+        return {
+            "version": FOLDER_MAP_VERSION,
+            "projectId": self.project_id,
+            "crawledAt": crawled_at,
+            "savedAt": saved_at,
+            # compact: "id": [name, parentId]
+            "folders": {str(fid): [name, parent] for fid, (name, parent) in folders.items()},
+            "roots": {str(fid): path for fid, path in roots.items()},
+            "tombstones": {str(fid): ts for fid, ts in tombstones.items()},
+        }
+
+    @classmethod
+    def from_record(cls, project_id: int, record: Optional[dict]) -> "ProjectFolderMap":
+        if not record or record.get("version") != FOLDER_MAP_VERSION or record.get("projectId") != project_id:
+            return cls(project_id)
+        folders = {int(fid): (name, parent) for fid, (name, parent) in (record.get("folders") or {}).items()}
+        roots = {int(fid): path for fid, path in (record.get("roots") or {}).items()}
+        tombstones = {int(fid): float(ts) for fid, ts in (record.get("tombstones") or {}).items()}
+        return cls(project_id, folders, roots, float(record.get("crawledAt") or 0.0), tombstones)
+
+
+class FolderMapStore:
+    """Loads/saves ProjectFolderMap records through a DiskStore or S3Store."""
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(project_id: int) -> str:
+        return f"project-{int(project_id)}"
+
+    def load(self, project_id: int) -> ProjectFolderMap:
+        try:
+            record = self.backend.get(self._key(project_id))
+        except Exception as e:
+            logger.warning(f"Folder map load failed for project {project_id}: {e}")
+            record = None
+        fmap = ProjectFolderMap.from_record(project_id, record)
+        if len(fmap):
+            logger.info(f"🗂️ Loaded folder map for project {project_id}: {len(fmap)} folders")
+        return fmap
+
+    def save(self, fmap: ProjectFolderMap) -> bool:
+        """
+        Merge this container's changes into the stored map (read-modify-write, conditional on
+        the stored version) rather than overwriting it; see ProjectFolderMap.merged_record.
+        """
+        if not fmap.dirty:
+            return False
+        pid = fmap.project_id
+        try:
+            with fmap._lock:
+                record = self.backend.update(
+                    self._key(pid), lambda stored: fmap.merged_record(ProjectFolderMap.from_record(pid, stored))
+                )
+                fmap.saved(record)
+            logger.info(f"🗂️ Saved folder map for project {pid}: {len(fmap)} folders")
+            return True
+        except Exception as e:
+            logger.warning(f"Folder map save failed for project {fmap.project_id}: {e}")
+            return False
+
+
+class FolderMapCache:
+    """
+    In-memory ProjectFolderMaps, LRU by project and bounded by the total number of
+    folders (maps grow while in use, so trim() is called between invocations).
+    Evicted maps go through `on_evict` first so unsaved folders are not lost.
+    - get / put / evict(projectId): whole-project access and eviction
+    - invalidate(projectId, folderId): drop one folder subtree
+    - expire(max_age): evict projects loaded longer ago than max_age seconds
+    """
+    def __init__(self, max_folders: int = FOLDER_CACHE_MAX_FOLDERS,
+                 max_projects: int = FOLDER_CACHE_MAX_PROJECTS,
+                 on_evict: Optional[Callable[[ProjectFolderMap], None]] = None):
+        self.max_folders  = max(1, max_folders)
+        self.max_projects = max(1, max_projects)
+        self.on_evict     = on_evict
+        self._lock        = threading.Lock()
+        self._maps: "OrderedDict[int, Tuple[ProjectFolderMap, float]]" = OrderedDict()
+        self.hits = self.misses = self.evictions = self.invalidated = 0
+
+    def __len__(self) -> int:
+        return len(self._maps)
+
+    def __contains__(self, project_id) -> bool:
+        return project_id in self._maps
+
+    def folders(self) -> int:
+        with self._lock:
+            return sum(len(fmap) for fmap, _ in self._maps.values())
+
+    def maps(self) -> List[ProjectFolderMap]:
+        with self._lock:
+            return [fmap for fmap, _ in self._maps.values()]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"projects": len(self._maps), "folders": sum(len(fmap) for fmap, _ in self._maps.values()),
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "invalidated": self.invalidated}
+
+    # ---- access ----
+    def get(self, project_id: int) -> Optional[ProjectFolderMap]:
+        with self._lock:
+            entry = self._maps.get(project_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._maps.move_to_end(project_id)
+            return entry[0]
+
+    def put(self, fmap: ProjectFolderMap) -> None:
+        """Add or replace a project's map (a replaced map is dropped, not passed to on_evict)."""
+        with self._lock:
+            self._maps[fmap.project_id] = (fmap, time.monotonic())
+            self._maps.move_to_end(fmap.project_id)
+        self.trim(keep=fmap.project_id)
+
+    # ---- eviction ----
+    def evict(self, project_id: int) -> Optional[ProjectFolderMap]:
+        with self._lock:
+            entry = self._maps.pop(project_id, None)
+            if entry is None:
+                return None
+            self.evictions += 1
+        self._evicted(entry[0])
+        return entry[0]
+
+    def trim(self, keep: Optional[int] = None) -> int:
+        """Evict least recently used projects (never `keep`) until within bounds. Returns how many."""
+        victims: List[ProjectFolderMap] = []
+        with self._lock:
+            total = sum(len(fmap) for fmap, _ in self._maps.values())
+            for pid in list(self._maps):
+                if total <= self.max_folders and len(self._maps) <= self.max_projects:
+                    break
+                if pid == keep:
+                    continue
+                fmap, _ = self._maps.pop(pid)
+                total -= len(fmap)
+                victims.append(fmap)
+            self.evictions += len(victims)
+        for fmap in victims:
+            self._evicted(fmap)
+        return len(victims)
+
+    def expire(self, max_age: float) -> int:
+        """Evict maps loaded more than max_age seconds ago (other containers may have updated them)."""
+        cutoff = time.monotonic() - max_age
+        with self._lock:
+            stale = [pid for pid, (_, loaded) in self._maps.items() if loaded < cutoff]
+        return sum(1 for pid in stale if self.evict(pid) is not None)
+
+    def invalidate(self, project_id: int, folder_id: int) -> List[int]:
+        """Drop a folder and its subtree from a cached project map. Returns removed ids."""
+        with self._lock:
+            entry = self._maps.get(project_id)
+        if entry is None:
+            return []
+        removed = entry[0].remove_subtree(folder_id)
+        with self._lock:
+            self.invalidated += len(removed)
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            victims = [fmap for fmap, _ in self._maps.values()]
+            self._maps.clear()
+            self.evictions += len(victims)
+        for fmap in victims:
+            self._evicted(fmap)
+
+    def _evicted(self, fmap: ProjectFolderMap) -> None:
+        logger.info(f"🗂️ Evicting folder map for project {fmap.project_id} ({len(fmap)} folders)")
+        if self.on_evict is not None:
+            try:
+                self.on_evict(fmap)
+            except Exception as e:
+                logger.warning(f"Saving evicted folder map for project {fmap.project_id} failed: {e}")
+
+
+def build_folder_map_store(s3_call: Optional[Callable] = None, bucket: Optional[str] = None) -> Optional[FolderMapStore]:
+    """From FV_FOLDER_MAP_STORE; None when disabled or not configurable."""
+    if FOLDER_MAP_STORE == "file" and FOLDER_MAP_DIR:
+        return FolderMapStore(DiskStore(FOLDER_MAP_DIR))
+    if FOLDER_MAP_STORE == "s3" and s3_call and bucket:
+        return FolderMapStore(S3Store(s3_call, bucket, FOLDER_MAP_S3_PREFIX))
+    return None
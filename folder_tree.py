@@ -0,0 +1,236 @@
+# === folder_tree.py ===
+import sys
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def _fold(name: str) -> str:
+    """Case-insensitive key for a folder name (interned: one copy per distinct name)."""
+    return sys.intern(name.lower())
+
+
+def _segments(path: str) -> List[str]:
+    return [s for s in (path or "").replace("\\", "/").split("/") if s]
+
+
+class FolderTree:
+    """
+    Folder index shared by the Lambda side (folderId -> path, Filevine -> S3) and the
+    uploader CLI (path -> folderId, Z: drive -> Filevine).
+    - folders: {folderId: (name, parentId)} with interned names; nothing else per folder
+    - roots:   {folderId: full path} for tops whose parents are not in the tree
+    - path(id): walks parents, O(depth); None when the chain leaves the tree
+    - find(path, under=None): walks a case-insensitive {parentId: {name: childId}} index, O(depth)
+    Paths are built on demand and never stored, so memory tracks the folder count, not depth.
+    Sibling names that differ only by case resolve to the first folder seen.
+    """
+    def __init__(self, folders: Optional[Dict[int, Tuple[str, Optional[int]]]] = None,
+                 roots: Optional[Dict[int, str]] = None):
+        self.folders: Dict[int, Tuple[str, Optional[int]]] = {}
+        self.roots: Dict[int, str] = {}
+        self._lock = threading.RLock()
+        self._children: Dict[Optional[int], Dict[str, int]] = {}
+        self._tops: Dict[str, int] = {}   # folded root path -> folderId
+        for fid, (name, parent) in (folders or {}).items():
+            self._insert(int(fid), name, parent)
+        for fid, path in (roots or {}).items():
+            self._insert_root(int(fid), path)
+
+    def __len__(self) -> int:
+        return len(self.folders)
+
+    def __contains__(self, folder_id) -> bool:
+        return int(folder_id) in self.folders
+
+    # ---- id -> path ----
+    def path(self, folder_id: int) -> Optional[str]:
+        with self._lock:
+            return self._path_locked(int(folder_id))
+
+    def _path_locked(self, fid: int) -> Optional[str]:
+        names: List[str] = []
+        cursor: Optional[int] = fid
+        while True:
+            if cursor in self.roots:
+                names.append(self.roots[cursor])
+                break
+            entry = self.folders.get(cursor)
+            if entry is None or len(names) > len(self.folders):
+                return None  # unknown ancestor (or a cycle): not answerable from the tree
+            names.append(entry[0])
+            if entry[1] is None:
+                break
+            cursor = entry[1]
+        return "/".join(reversed(names))
+
+    def paths(self) -> Dict[int, str]:
+        """Every folder whose path is answerable from the tree (each parent's path built once)."""
+        with self._lock:
+            out: Dict[int, Optional[str]] = {}
+            for fid in list(self.folders) + [r for r in self.roots if r not in self.folders]:
+                chain: List[int] = []
+                cursor: Optional[int] = fid
+                base: Optional[str] = None
+                while cursor not in out:
+                    if cursor in self.roots:
+                        base = out[cursor] = self.roots[cursor]
+                        break
+                    entry = self.folders.get(cursor)
+                    if entry is None or cursor in chain:
+                        break
+                    chain.append(cursor)
+                    if entry[1] is None:
+                        base = ""
+                        break
+                    cursor = entry[1]
+                else:
+                    base = out[cursor]
+                for node in reversed(chain):
+                    if base is not None:
+                        name = self.folders[node][0]
+                        base = f"{base}/{name}" if base else name
+                    out[node] = base
+            return {fid: p for fid, p in out.items() if p is not None}
+
+    def unknown_ancestor(self, folder_id: int) -> Optional[int]:
+        """First folder on the way up from `folder_id` (itself included) that the tree lacks; None if the chain is complete."""
+        with self._lock:
+            cursor: Optional[int] = int(folder_id)
+            for _ in range(len(self.folders) + 1):
+                if cursor in self.roots:
+                    return None
+                entry = self.folders.get(cursor)
+                if entry is None:
+                    return cursor
+                if entry[1] is None:
+                    return None
+                cursor = entry[1]
+            return None  # cycle
+
+    # ---- path -> id ----
+    def child(self, parent_id: Optional[int], name: str) -> Optional[int]:
+        """Direct child of `parent_id` (None = top level) named `name`, ignoring case."""
+        with self._lock:
+            return self._children.get(parent_id, {}).get(name.lower())
+
+    def children(self, parent_id: Optional[int]) -> List[Tuple[int, str]]:
+        """Known direct children as (folderId, name)."""
+        with self._lock:
+            return [(cid, self.folders[cid][0]) for cid in self._children.get(parent_id, {}).values()]
+
+    def find(self, path: str, under: Optional[int] = None) -> Optional[int]:
+        """
+        folderId for 'A/B/C' (case-insensitive). With `under`, the path is relative to
+        that folder ('' -> `under`); otherwise it starts at a root path or a top folder.
+        """
+        segs = _segments(path)
+        with self._lock:
+            cursor: Optional[int] = None
+            if under is not None:
+                cursor = int(under)
+            else:
+                for i in range(len(segs), 0, -1):
+                    top = self._tops.get("/".join(segs[:i]).lower())
+                    if top is not None:
+                        cursor, segs = top, segs[i:]
+                        break
+                else:
+                    if not segs:
+                        return None
+            for seg in segs:
+                cursor = self._children.get(cursor, {}).get(seg.lower())
+                if cursor is None:
+                    return None
+            return cursor
+
+    # ---- updates ----
+    def add(self, folder_id: int, name: str, parent_id: Optional[int]) -> bool:
+        """Record a folder; returns True if the tree changed (new, renamed or moved)."""
+        fid = int(folder_id)
+        parent = int(parent_id) if parent_id else None
+        with self._lock:
+            old = self.folders.get(fid)
+            if old is not None and old[1] == parent and old[0] == name:
+                return False
+            if old is not None:
+                self._unindex(fid, old)
+            self._insert(fid, name, parent)
+            return True
+
+    def update(self, entries: Iterable[Tuple[int, str, Optional[int]]]) -> int:
+        """add() for many (folderId, name, parentId); returns how many changed the tree."""
+        return sum(1 for fid, name, parent in entries if self.add(fid, name, parent))
+
+    def set_root(self, folder_id: int, path: str) -> bool:
+        fid = int(folder_id)
+        with self._lock:
+            old = self.roots.get(fid)
+            if old == path:
+                return False
+            if old is not None and self._tops.get(old.lower()) == fid:
+                del self._tops[old.lower()]
+            self._insert_root(fid, path)
+            return True
+
+    def remove_subtree(self, folder_id: int) -> List[int]:
+        """Forget a folder and everything under it (renamed/moved/deleted). Returns removed ids."""
+        with self._lock:
+            below: Dict[int, List[int]] = {}
+            for fid, (_, parent) in self.folders.items():
+                if parent is not None:
+                    below.setdefault(parent, []).append(fid)
+            removed: List[int] = []
+            seen = set()
+            stack = [int(folder_id)]
+            while stack:
+                fid = stack.pop()
+                if fid in seen:
+                    continue
+                seen.add(fid)
+                removed.append(fid)
+                stack.extend(below.get(fid, []))
+            for fid in removed:
+                self.folders.pop(fid, None)
+                self.roots.pop(fid, None)
+            self._reindex()
+            return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self.folders.clear()
+            self.roots.clear()
+            self._children.clear()
+            self._tops.clear()
+
+    # ---- index upkeep ----
+    def _insert(self, fid: int, name: str, parent: Optional[int]) -> None:
+        name = sys.intern(name)
+        parent = int(parent) if parent else None
+        self.folders[fid] = (name, parent)
+        self._children.setdefault(parent, {}).setdefault(_fold(name), fid)
+
+    def _insert_root(self, fid: int, path: str) -> None:
+        self.roots[fid] = path
+        self._tops.setdefault(path.lower(), fid)
+
+    def _unindex(self, fid: int, entry: Tuple[str, Optional[int]]) -> None:
+        name, parent = entry
+        siblings = self._children.get(parent)
+        if not siblings or siblings.get(_fold(name)) != fid:
+            return
+        del siblings[_fold(name)]
+        # A same-named sibling that lost the first-seen race takes over (rare: renames/moves only)
+        for other, (other_name, other_parent) in self.folders.items():
+            if other != fid and other_parent == parent and _fold(other_name) == _fold(name):
+                siblings[_fold(name)] = other
+                break
+        if not siblings:
+            del self._children[parent]
+
+    def _reindex(self) -> None:
+        self._children.clear()
+        self._tops.clear()
+        for fid, (name, parent) in self.folders.items():
+            self._children.setdefault(parent, {}).setdefault(_fold(name), fid)
+        for fid, path in self.roots.items():
+            self._tops.setdefault(path.lower(), fid)
@@ -486,9 +486,11 @@ import re
 import sys
 import mimetypes
 import requests
-from functools import lru_cache
-from typing import Optional, List, Tuple, Dict
-from auth_refresh import get_dynamic_headers
+from typing import Optional, List, Tuple, Dict, Set
+from auth_refresh import get_dynamic_headers, invalidate_token_cache
+from rate_limit import get_rate_limiter
+from retry import RetryPolicy
+from folder_tree import FolderTree
 # from config import BASE_URL
 from dotenv import load_dotenv
 load_dotenv()
@@ -520,35 +522,45 @@ def sanitize(name: Optional[str]) -> str:
 
 # -------- HTTP with retry/backoff (429-safe) ---------------------------------
 _session = requests.Session()
+# Presigned upload bodies get their own keep-alive pool so they never hold the API connection
+_storage_session = requests.Session()
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "5"))
+STORAGE_WRITE_TIMEOUT   = float(os.getenv("STORAGE_WRITE_TIMEOUT", "300"))
+# Shared with utils.DocumentProcessor; set FV_RATE_LIMIT_FILE to share it across processes
+_limiter = get_rate_limiter()
+# Same attempt cap and retry budget rules as the Lambda's request layer
+_retry = RetryPolicy()
 
 def _request(method: str, url: str, **kw) -> requests.Response:
+    """429/5xx/network errors retry per the shared RetryPolicy (attempt cap + run-wide budget)."""
     timeout = kw.pop("timeout", 30)
-    sleep = 0.25
-    last = None
-    for _ in range(6):
+    attempt = 0
+    _retry.started()
+    while True:
         try:
             headers = get_dynamic_headers()
+            _limiter.acquire()
             r = _session.request(method, url, headers=headers, timeout=timeout, **kw)
             if r.status_code == 401:
+                # Cached token was rejected: drop it and retry once with a new session
+                invalidate_token_cache(headers["Authorization"].replace("Bearer ", "", 1))
                 headers = get_dynamic_headers()
+                _limiter.acquire()
                 r = _session.request(method, url, headers=headers, timeout=timeout, **kw)
-            if r.status_code == 429:
-                wait = float(r.headers.get("Retry-After", sleep))
-                log(f"FV: 429 Too Many Requests → backing off {wait:.2f}s for {url}")
-                time.sleep(wait)
-                sleep = min(sleep * 2, 2.0)
-                last = r
-                continue
             r.raise_for_status()
             return r
-        except requests.RequestException:
-            time.sleep(sleep)
-            sleep = min(sleep * 2, 2.0)
-            last = r if 'r' in locals() else None
-            continue
-    if last is not None:
-        last.raise_for_status()
-    raise RuntimeError("Filevine request failed after retries")
+        except requests.RequestException as e:
+            if not _retry.allow(attempt, e):
+                raise
+            delay = _retry.delay(attempt)
+            resp = getattr(e, "response", None)
+            if resp is not None and resp.status_code == 429:
+                # Pause every caller (and, with a shared state file, every process)
+                wait = _limiter.pause_from_response(resp, default=delay)
+                log(f"FV: 429 Too Many Requests → backing off {wait:.2f}s for {url}")
+            else:
+                time.sleep(delay)
+            attempt += 1
 
 def fv_get(url: str, **kw) -> requests.Response:
     return _request("GET", url, **kw)
@@ -558,13 +570,17 @@ def fv_post(url: str, json_body: dict, **kw) -> requests.Response:
 
 # -------- Folder helpers -----------------------------------------------------
 
-@lru_cache(maxsize=2048)
+# Folders seen this run: {id: (name, parentId)} + case-insensitive child-name index
+_tree = FolderTree()
+# Folders whose complete child list is in _tree (a missing name there means "no such folder")
+_listed: Set[int] = set()
+
 def _children_page(project_id: int, folder_id: int, offset: int, limit: int) -> List[dict]:
     url = f"{BASE_URL}/core/folders/{folder_id}/children?projectId={project_id}&offset={offset}&limit={limit}"
     return fv_get(url).json().get("items", [])
 
 def list_children(project_id: int, folder_id: int) -> List[dict]:
-    """Fetch *all* children with pagination (cached per page)."""
+    """Fetch *all* children with pagination."""
     items, off = [], 0
     while True:
         page = _children_page(project_id, folder_id, off, 500)
@@ -576,6 +592,17 @@ def list_children(project_id: int, folder_id: int) -> List[dict]:
         off += 500
     return items
 
+def load_children(project_id: int, folder_id: int) -> None:
+    """List a folder's children into _tree once per run."""
+    folder_id = int(folder_id)
+    if folder_id in _listed:
+        return
+    for ch in list_children(project_id, folder_id):
+        cid = (ch.get("folderId") or {}).get("native")
+        if cid:
+            _tree.add(int(cid), (ch.get("name") or "").strip(), folder_id)
+    _listed.add(folder_id)
+
 def guess_project_root_id(project_id: int) -> Optional[int]:
     """
     Heuristic: call /core/folders?projectId=.. and take the most common parentId of items.
@@ -598,18 +625,16 @@ def resolve_under_root(project_id: int, root_folder_id: int, subpath: str) -> Op
     if not subpath:
         return int(root_folder_id)
 
+    found = _tree.find(subpath, under=root_folder_id)
+    if found is not None:
+        return found
+
     segs = [s for s in subpath.replace("\\", "/").split("/") if s]
     current = int(root_folder_id)
 
     for seg in segs:
-        target = seg.lower()
-        found = None
-        for ch in list_children(project_id, current):
-            cid = (ch.get("folderId") or {}).get("native")
-            nm  = (ch.get("name") or "").lower()
-            if cid and nm == target:
-                found = int(cid)
-                break
+        load_children(project_id, current)
+        found = _tree.child(current, seg)
         if found is None:
             return None
         current = found
@@ -658,11 +683,13 @@ def upload_to_signed_url(upload_info: Dict, local_path: str) -> bool:
         if fields:
             # Presigned POST
             files = {"file": (os.path.basename(local_path), f, ctype)}
-            rr = _session.post(url, data=fields, files=files, timeout=300)
+            rr = _storage_session.post(url, data=fields, files=files,
+                                       timeout=(STORAGE_CONNECT_TIMEOUT, STORAGE_WRITE_TIMEOUT))
             return 200 <= rr.status_code < 300
         else:
             # Presigned PUT
-            rr = _session.put(url, data=f, headers={"Content-Type": ctype}, timeout=300)
+            rr = _storage_session.put(url, data=f, headers={"Content-Type": ctype},
+                                      timeout=(STORAGE_CONNECT_TIMEOUT, STORAGE_WRITE_TIMEOUT))
             return rr.status_code in (200, 204)
 
 def finalize_document(project_id: int, doc_id: int, file_name: str, file_size: int, folder_id: Optional[int]) -> bool:
@@ -689,14 +716,15 @@ def upload_file(project_id: int, local_path: str, folder_id: int) -> str:
     doc_id, upload_info = register_document(file_name, file_size)
     log(f"[OK] Registered docId={doc_id}", project_id=project_id, doc_id=doc_id)
 
-    # retry up to 3 times for signed URL upload
-    for attempt in range(3):
-        if upload_to_signed_url(upload_info, local_path):
-            break
+    # retry up to 3 times for signed URL upload (spends the same retry budget as API calls)
+    attempt = 0
+    _retry.started()
+    while not upload_to_signed_url(upload_info, local_path):
+        if attempt + 1 >= 3 or not _retry.budget.withdraw():
+            raise RuntimeError(f"Upload failed after retries for docId={doc_id}")
         log(f"[WARN] Upload attempt {attempt+1} failed, retrying...", project_id=project_id, doc_id=doc_id)
-        time.sleep(2)
-    else:
-        raise RuntimeError(f"Upload failed after retries for docId={doc_id}")
+        time.sleep(_retry.delay(attempt))
+        attempt += 1
 
     log("[OK] Content uploaded", project_id=project_id, doc_id=doc_id)
     finalize_document(project_id, int(doc_id), file_name, file_size, folder_id)
@@ -708,7 +736,8 @@ def lookup_project(name):
     limit = 100
     while True:
         url = f"{BASE_URL}/core/projects?offset={offset}&limit={limit}"
-        resp = requests.get(url, headers=headers)
+        _limiter.acquire()
+        resp = _session.get(url, headers=headers)
         if resp.status_code != 200:
             print(0)
             sys.exit(1)
@@ -781,8 +810,8 @@ def resolve_smart_path(project_id: int, root_id: int, subpath: str) -> Optional[
         return fid
 
     # discover root tiles
-    root_children = list_children(project_id, root_id)
-    names = [(c.get("name") or "").strip() for c in root_children]
+    load_children(project_id, root_id)
+    names = [name for _, name in _tree.children(int(root_id))]
     names_lc = [n.lower() for n in names]
 
     # prepend Documents/
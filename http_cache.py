@@ -0,0 +1,284 @@
+# === http_cache.py ===
+import os
+import re
+import json
+import time
+import base64
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+# Validator cache for Filevine GETs (ETag / Last-Modified -> conditional requests)
+HTTP_CACHE_ENABLED     = os.getenv("FV_HTTP_CACHE", "true").lower() in ("1", "true", "yes")
+# Memory tier is bounded by total body bytes (it survives warm invocations)
+HTTP_CACHE_MAX_BYTES   = int(os.getenv("FV_HTTP_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+HTTP_CACHE_MAX_BODY    = int(os.getenv("FV_HTTP_CACHE_MAX_BODY", str(1024 * 1024)))
+# Optional second tier so entries survive cold starts / process restarts
+HTTP_CACHE_DIR         = os.getenv("FV_HTTP_CACHE_DIR", "").strip()
+HTTP_CACHE_S3_PREFIX   = os.getenv("FV_HTTP_CACHE_S3_PREFIX", "").strip()  # e.g. "_sync_cache/http/"
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+# Response headers worth keeping with a cached body
+_KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Cache-Control")
+
+
+class DiskStore:
+    """One JSON file per key under `root`."""
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, f"{key}.json")
+
+    def get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, record: dict) -> None:
+        from file_lock import atomic_write
+        atomic_write(self._path(key), json.dumps(record).encode("utf-8"), mode=0o600)
+
+    def update(self, key: str, fn: Callable[[Optional[dict]], dict]) -> dict:
+        """Read-modify-write under a file lock: fn(current record or None) -> record to write."""
+        from file_lock import FileLock
+        with FileLock(f"{self._path(key)}.lock"):
+            record = fn(self.get(key))
+            self.put(key, record)
+            return record
+
+
+class S3Store:
+    """One JSON object per key under `prefix` (keep it outside S3_PREFIX so it is never mirrored)."""
+    def __init__(self, s3_call: Callable, bucket: str, prefix: str):
+        self.s3_call = s3_call
+        self.bucket  = bucket
+        self.prefix  = prefix if prefix.endswith("/") else prefix + "/"
+
+    def get(self, key: str) -> Optional[dict]:
+        from botocore.exceptions import ClientError
+        try:
+            obj = self.s3_call("get_object", Bucket=self.bucket, Key=f"{self.prefix}{key}.json")
+            return json.loads(obj["Body"].read())
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                logger.warning(f"Cache read failed for {self.prefix}{key}: {e}")
+            return None
+        except ValueError:
+            return None
+
+    def put(self, key: str, record: dict) -> None:
+        self.s3_call("put_object", Bucket=self.bucket, Key=f"{self.prefix}{key}.json",
+                     Body=json.dumps(record).encode("utf-8"), ContentType="application/json")
+
+    def update(self, key: str, fn: Callable[[Optional[dict]], dict], attempts: int = 5) -> dict:
+        """
+        Read-modify-write: fn(current record or None) -> record to write. The put is conditional
+        on the ETag that was read (If-Match / If-None-Match), so a concurrent writer makes it
+        re-read and call fn again instead of being overwritten.
+        """
+        from botocore.exceptions import ClientError
+        obj_key = f"{self.prefix}{key}.json"
+        for _ in range(attempts):
+            record, etag = None, None
+            try:
+                obj = self.s3_call("get_object", Bucket=self.bucket, Key=obj_key)
+                etag = obj.get("ETag")
+                record = json.loads(obj["Body"].read())
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("NoSuchKey", "404"):
+                    raise
+            except ValueError:
+                record = None  # unreadable: overwrite it, but still only if nobody else did
+            record = fn(record)
+            condition = {"IfMatch": etag} if etag else {"IfNoneMatch": "*"}
+            try:
+                self.s3_call("put_object", Bucket=self.bucket, Key=obj_key,
+                             Body=json.dumps(record).encode("utf-8"), ContentType="application/json",
+                             **condition)
+                return record
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in ("PreconditionFailed", "ConditionalRequestConflict"):
+                    raise
+                logger.info(f"Concurrent write to {obj_key}; re-reading")
+        raise RuntimeError(f"{obj_key}: gave up after {attempts} conflicting writes")
+
+
+def build_store(s3_call: Optional[Callable] = None, bucket: Optional[str] = None):
+    """Persistent tier from env: FV_HTTP_CACHE_DIR wins over FV_HTTP_CACHE_S3_PREFIX; None = memory only."""
+    if HTTP_CACHE_DIR:
+        return DiskStore(HTTP_CACHE_DIR)
+    if HTTP_CACHE_S3_PREFIX and s3_call and bucket:
+        return S3Store(s3_call, bucket, HTTP_CACHE_S3_PREFIX)
+    return None
+
+
+class HttpCache:
+    """
+    Stores GET bodies with their validators (ETag / Last-Modified).
+    - conditional_headers(url): If-None-Match / If-Modified-Since for a cached URL
+    - fresh(url): cached response still inside Cache-Control max-age (no request needed)
+    - resolve(url, response): 304 -> rebuild the cached response, 200 -> store and pass through
+    Memory is an LRU holding at most `max_bytes` of bodies; `store` (disk or S3) is
+    read on a memory miss and written whenever a new body arrives.
+    """
+    def __init__(self, max_bytes: int = HTTP_CACHE_MAX_BYTES, store=None,
+                 max_body: int = HTTP_CACHE_MAX_BODY):
+        self.max_bytes   = max(1, max_bytes)
+        self.max_body    = min(max_body, self.max_bytes)
+        self.store       = store
+        self._lock       = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        self._bytes      = 0
+        self.reset_stats()
+
+    # ---- stats ----
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits        = 0   # served from cache without a request (max-age)
+            self.revalidated = 0   # conditional request answered 304
+            self.misses      = 0   # full 200 body downloaded (no entry, or entry was stale)
+            self.bytes_saved = 0   # body bytes not re-downloaded thanks to hits/304s
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses,
+                    "bytesSaved": self.bytes_saved, "entries": len(self._entries), "bytes": self._bytes}
+
+    # ---- entries ----
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        key = self._key(url)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if self.store is None:
+            return None
+        try:
+            record = self.store.get(key)
+        except Exception as e:
+            logger.warning(f"HTTP cache store read failed: {e}")
+            return None
+        if not record or record.get("url") != url:
+            return None
+        entry = {**record, "body": base64.b64decode(record["body"])}
+        if len(entry["body"]) <= self.max_body:
+            self._remember(key, entry)
+        return entry
+
+    def _remember(self, key: str, entry: dict) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old["body"])
+            self._entries[key] = entry
+            self._bytes += len(entry["body"])
+            while self._bytes > self.max_bytes and self._entries:
+                _, dropped = self._entries.popitem(last=False)
+                self._bytes -= len(dropped["body"])
+
+    def forget(self, url: str) -> None:
+        with self._lock:
+            old = self._entries.pop(self._key(url), None)
+            if old is not None:
+                self._bytes -= len(old["body"])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # ---- request flow ----
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        entry = self._lookup(url)
+        if entry is None:
+            return {}
+        headers = {}
+        if entry["headers"].get("ETag"):
+            headers["If-None-Match"] = entry["headers"]["ETag"]
+        if entry["headers"].get("Last-Modified"):
+            headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+        return headers
+
+    def fresh(self, url: str) -> Optional[requests.Response]:
+        entry = self._lookup(url)
+        if entry is None or entry.get("expires", 0) <= time.time():
+            return None
+        with self._lock:
+            self.hits += 1
+            self.bytes_saved += len(entry["body"])
+        return self._response(url, entry)
+
+    def resolve(self, url: str, response: requests.Response) -> requests.Response:
+        """Turn a 304 into the cached response; cache a validated 200."""
+        if response.status_code == 304:
+            entry = self._lookup(url)
+            if entry is not None:
+                entry["expires"] = self._expires(response.headers) or entry.get("expires", 0)
+                with self._lock:
+                    self.revalidated += 1
+                    self.bytes_saved += len(entry["body"])
+                return self._response(url, entry)
+            return response  # 304 without an entry: nothing to serve, let the caller see it
+
+        if response.status_code == 200:
+            with self._lock:
+                self.misses += 1
+            self._put(url, response)
+        return response
+
+    def _put(self, url: str, response: requests.Response) -> None:
+        cc = (response.headers.get("Cache-Control") or "").lower()
+        if "no-store" in cc:
+            return
+        if not (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            return
+        body = response.content
+        if len(body) > self.max_body:
+            return
+        entry = {
+            "url": url,
+            "headers": {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers},
+            "expires": self._expires(response.headers),
+            "body": body,
+        }
+        key = self._key(url)
+        self._remember(key, entry)
+        if self.store is not None:
+            try:
+                self.store.put(key, {**entry, "body": base64.b64encode(body).decode("ascii")})
+            except Exception as e:
+                logger.warning(f"HTTP cache store write failed: {e}")
+
+    @staticmethod
+    def _expires(headers) -> float:
+        cc = (headers.get("Cache-Control") or "").lower()
+        if "no-cache" in cc or "no-store" in cc:
+            return 0.0
+        m = _MAX_AGE.search(cc)
+        return time.time() + int(m.group(1)) if m else 0.0
+
+    @staticmethod
+    def _response(url: str, entry: dict) -> requests.Response:
+        r = requests.Response()
+        r.status_code = 200
+        r.url         = url
+        r.headers     = CaseInsensitiveDict(entry["headers"])
+        r._content    = entry["body"]
+        r.encoding    = requests.utils.get_encoding_from_headers(r.headers) or "utf-8"
+        return r
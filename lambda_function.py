@@ -1,13 +1,30 @@
 # === lambda_function.py ===
+import time
+_INIT_STARTED = time.perf_counter()  # cold-start clock; keep this first
+
 import json
 import os
 import base64
-import boto3
-import requests
 import logging
+from contextlib import contextmanager
+
+# ---------- cold-start timing ----------
+STARTUP_TIMING_REPORT = os.getenv("STARTUP_TIMING_REPORT", "true").lower() in ("1", "true", "yes")
+_import_ms = {}
+_cold_start = True
+
+@contextmanager
+def _timed_import(name: str):
+    t0 = time.perf_counter()
+    yield
+    _import_ms[name] = round((time.perf_counter() - t0) * 1000, 1)
 
-from utils import DocumentProcessor
-from auth_refresh import get_dynamic_headers
+# boto3 is not imported here: utils.get_client() loads it on first AWS call
+with _timed_import("auth_refresh"):
+    from auth_refresh import get_dynamic_headers
+with _timed_import("utils"):
+    from utils import DocumentProcessor, get_client
+    from deadline import Deadline, DeadlineExceeded, FLUSH_SAFETY_SECONDS
 
 # ---------- logging ----------
 logger = logging.getLogger(__name__)
@@ -17,7 +34,69 @@ if not logger.handlers:
     logger.addHandler(_h)
 logger.setLevel(logging.INFO)
 
-_lambda = boto3.client("lambda")
+_INIT_DONE = time.perf_counter()
+
+def _report_cold_start():
+    """Log import cost per module and time-to-first-handler-line, once per container."""
+    global _cold_start
+    if not _cold_start:
+        return
+    _cold_start = False
+    if not STARTUP_TIMING_REPORT:
+        return
+    now = time.perf_counter()
+    report = {
+        "imports_ms": _import_ms,
+        "init_ms": round((_INIT_DONE - _INIT_STARTED) * 1000, 1),
+        "first_handler_line_ms": round((now - _INIT_STARTED) * 1000, 1),
+    }
+    logger.info(f"🧊 cold start: {json.dumps(report)}")
+
+# Reused across warm invocations (boto3 clients, HTTP pool, folder/project caches)
+_processor = None
+
+def get_processor(deadline: Deadline) -> DocumentProcessor:
+    """
+    Return the container-wide DocumentProcessor, expiring stale cached state.
+    The deadline is installed first: expiry saves evicted folder maps under it.
+    """
+    global _processor
+    fresh = _processor is None
+    if fresh:
+        _processor = DocumentProcessor()
+    _processor.deadline = deadline
+    if not fresh:
+        _processor.expire_stale_caches()
+    return _processor
+
+# Webhook events that hit the deadline are re-invoked asynchronously at most this many times
+DEADLINE_REQUEUE_MAX = int(os.getenv("FV_DEADLINE_REQUEUE_MAX", "2"))
+
+# Processing engine: "sync" (DocumentProcessor) or "async" (AsyncDocumentProcessor)
+FV_ENGINE = os.getenv("FV_ENGINE", "sync").strip().lower()
+_async_engine = None
+
+class _BlockingFacade:
+    """Lets the router call AsyncDocumentProcessor's coroutines like DocumentProcessor methods."""
+    def __init__(self, engine):
+        import asyncio  # only the async engine pays for it at cold start
+        self._run = asyncio.run
+        self._engine = engine
+
+    def __getattr__(self, name):
+        fn = getattr(self._engine, name)
+        return lambda *args, **kwargs: self._run(fn(*args, **kwargs))
+
+def get_engine(proc: DocumentProcessor):
+    """Return the object that runs sync/upload/delete work for this invocation."""
+    global _async_engine
+    if FV_ENGINE != "async":
+        return proc
+    if _async_engine is None:
+        with _timed_import("async_processor"):
+            from async_processor import AsyncDocumentProcessor
+        _async_engine = _BlockingFacade(AsyncDocumentProcessor(proc))
+    return _async_engine
 
 # ---------- helpers ----------
 
@@ -85,6 +164,20 @@ def extract_document_id(body):
     except Exception:
         return None
 
+def extract_folder_id(body):
+    """Same shapes as extract_document_id, for folderId. Returns int or None."""
+    raw = (
+        body.get("folderId")
+        or body.get("FolderId")
+        or (body.get("payload") or {}).get("folderId")
+    )
+    if isinstance(raw, dict):
+        raw = raw.get("native", None)
+    try:
+        return int(raw) if raw is not None else None
+    except Exception:
+        return None
+
 def looks_like_delete(ev: str) -> bool:
     tokens = ("delete", "deleted", "remove", "removed", "trash", "purge")
     return any(t in ev for t in tokens)
@@ -93,6 +186,10 @@ def looks_like_create_or_update(ev: str) -> bool:
     tokens = ("create", "created", "upload", "uploaded", "update", "updated", "rename", "moved")
     return any(t in ev for t in tokens)
 
+def looks_like_rename_or_move(ev: str) -> bool:
+    tokens = ("rename", "renamed", "move", "moved")
+    return any(t in ev for t in tokens)
+
 def doc_exists(proc: DocumentProcessor, doc_id: int, headers) -> bool:
     """
     Probe Filevine: 200 -> exists, 404 -> gone (treat as delete),
@@ -100,13 +197,16 @@ def doc_exists(proc: DocumentProcessor, doc_id: int, headers) -> bool:
     """
     url = f"{proc.base_url}/core/documents/{doc_id}"
     try:
-        res = requests.get(url, headers=headers, timeout=8)
+        proc.limiter.acquire(deadline=proc.deadline)
+        res = proc.http.get(url, headers=headers, timeout=proc.deadline.timeout(8))
         if res.status_code == 200:
             return True
         if res.status_code == 404:
             return False
         logger.info(f"doc_exists: unexpected {res.status_code} for {doc_id}; body={res.text[:200]}")
         return True
+    except DeadlineExceeded:
+        raise
     except Exception as e:
         logger.error(f"doc_exists: request failed for {doc_id}: {e}")
         return True  # avoid accidental deletes on transient errors
@@ -123,11 +223,62 @@ def _delegate_upload(proc: DocumentProcessor, body: dict, headers: dict):
         logger.info("router: handle_document_upload not found; delegating to handle_single_document_upload")
         return proc.handle_single_document_upload(body, headers)
 
+def queue_background_sync(context, pid: int, full_sweep: bool = False) -> bool:
+    """Invoke this function asynchronously with a project-wide sync; False if it could not be queued."""
+    payload = {"__background_sync": True, "projectId": pid}
+    if full_sweep:
+        payload["fullSweep"] = True
+    try:
+        get_client("lambda").invoke(
+            FunctionName=context.function_name,
+            InvocationType="Event",
+            Payload=json.dumps(payload).encode()
+        )
+        return True
+    except Exception as e:
+        logger.error(f"Failed to queue background sync for pid={pid}: {e}")
+        return False
+
+def _requeue(event, context, proc: DocumentProcessor, reason: Exception):
+    """
+    The invocation ran out of time: hand the same event to a fresh asynchronous
+    invocation (bounded by DEADLINE_REQUEUE_MAX) instead of being killed mid-upload.
+    """
+    event = event if isinstance(event, dict) else {}
+    count = int(event.get("__requeue_count", 0))
+    if event and not event.get("__background_sync") and count < DEADLINE_REQUEUE_MAX:
+        try:
+            get_client("lambda").invoke(
+                FunctionName=context.function_name,
+                InvocationType="Event",
+                Payload=json.dumps({**event, "__requeue_count": count + 1}).encode()
+            )
+            logger.warning(f"⏱️ {reason}; re-queued event (attempt {count + 1}/{DEADLINE_REQUEUE_MAX})")
+            return proc.success_response({"status": "requeued", "reason": "deadline", "requeueCount": count + 1})
+        except Exception as e:
+            logger.error(f"Failed to re-queue event after deadline: {e}")
+    logger.error(f"⏱️ {reason}; abandoning event")
+    return proc.error_response(504, "Deadline exceeded before work completed")
+
 # ---------- handler ----------
 
 def lambda_handler(event, context):
+    _report_cold_start()
+    # Every timeout and backoff below is clamped to what this invocation has left
+    proc = get_processor(Deadline.from_context(context))
+    try:
+        return _route(event, context, proc)
+    except DeadlineExceeded as e:
+        return _requeue(event, context, proc, e)
+    finally:
+        # Folders learned (or invalidated) during this invocation; saved out of the safety
+        # margin, so a sync that used up its own deadline still keeps what it learned
+        proc.deadline = Deadline.from_context(context, safety=FLUSH_SAFETY_SECONDS)
+        proc.save_project_folders()
+
+def _route(event, context, proc: DocumentProcessor):
     body    = parse_input(event)
-    proc    = DocumentProcessor()
+    engine  = get_engine(proc)
     headers = get_dynamic_headers()
     # ALLOWED_PID = 2370300
     # 0) background seed run?
@@ -137,7 +288,7 @@ def lambda_handler(event, context):
         #     logger.info(f"⏭️ skipping background sync pid={pid} (not allowed)")
         #     return proc.success_response({"status": "skipped", "projectId": pid, "reason": "not_allowed"})
         logger.info(f"↩️ background sync for project {pid}")
-        return proc.sync_documents(pid, headers)
+        return engine.sync_documents(pid, headers, full_sweep=bool(body.get("fullSweep")))
 
     # # 1) project filter
     # pid = proc.extract_project_id(body)
@@ -165,19 +316,11 @@ def lambda_handler(event, context):
     def ensure_seed_if_needed():
         project_name = proc.sanitize(proc.get_project_name(pid, headers))
         project_pref = f"{proc.prefix}{project_name}/"
-        s3 = boto3.client("s3")
-        exists = s3.list_objects_v2(Bucket=proc.bucket, Prefix=project_pref, MaxKeys=1)
+        exists = proc._s3_call("list_objects_v2", Bucket=proc.bucket, Prefix=project_pref, MaxKeys=1)
         if exists.get("KeyCount", 0) == 0:
             logger.info(f"🌱 queueing initial seed for {project_pref}")
-            try:
-                _lambda.invoke(
-                    FunctionName=context.function_name,
-                    InvocationType="Event",
-                    Payload=json.dumps({"__background_sync": True, "projectId": pid}).encode()
-                )
-            except Exception as e:
-                logger.error(f"Failed to queue background seed: {e}")
-                # fall through; not fatal for single doc handling
+            # a failure is logged and not fatal for single doc handling
+            queue_background_sync(context, pid)
             return proc.success_response({
                 "status": "initial_seed_queued",
                 "message": "Project seed scheduled in background."
@@ -189,11 +332,31 @@ def lambda_handler(event, context):
     did = extract_document_id(body)
     logger.info(f"🧭 router: eventType='{ev}' documentId={did} projectId={pid}")
 
-    # 4) direct routes when event type is clear
+    # 4) folder events: drop the folder's subtree from the stored map, then re-learn it unless deleted.
+    #    A rename/move also changes the S3 path of every document below it, so a project sync
+    #    is queued; it must be a full sweep, since those documents' modified dates don't change.
+    if "folder" in ev and did is None:
+        fid = extract_folder_id(body)
+        if fid is None:
+            return proc.error_response(400, "folder event missing folderId")
+        cached  = proc.use_project_folders(pid).path(fid)
+        removed = proc.invalidate_folder(pid, fid)
+        queued = False
+        if not looks_like_delete(ev):
+            path = proc.resolve_folder_path(fid, headers, fallback="")
+            # Stored objects only need re-keying when the folder's path changed; a new folder has none
+            if looks_like_rename_or_move(ev) or (cached and path and path != cached):
+                logger.info(f"📁 folder {fid} path '{cached}' -> '{path}'; queueing project sync for pid={pid}")
+                queued = queue_background_sync(context, pid, full_sweep=True)
+        return proc.success_response({"status": "folder_map_updated", "projectId": pid,
+                                      "folderId": fid, "invalidated": len(removed),
+                                      "syncQueued": queued})
+
+    # 5) direct routes when event type is clear
     if looks_like_delete(ev):
         if did is None:
             return proc.error_response(400, "delete event missing documentId")
-        return proc.handle_document_delete(body, headers)
+        return engine.handle_document_delete(body, headers)
 
     if looks_like_create_or_update(ev):
         if did is None:
@@ -202,30 +365,32 @@ def lambda_handler(event, context):
         seeded = ensure_seed_if_needed()
         if seeded:
             return seeded
-        return _delegate_upload(proc, body, headers)
+        return _delegate_upload(engine, body, headers)
 
-    # 5) ambiguous events: fall back to probing the doc
+    # 6) ambiguous events: fall back to probing the doc
     if did is not None:
         exists = doc_exists(proc, did, headers)
         if exists:
             seeded = ensure_seed_if_needed()
             if seeded:
                 return seeded
-            return _delegate_upload(proc, body, headers)
+            return _delegate_upload(engine, body, headers)
         else:
             # 404 -> treat as delete
-            return proc.handle_document_delete(body, headers)
+            return engine.handle_document_delete(body, headers)
 
-    # # 6) no documentId and unclassified -> no-op (or queue a small sync if you prefer)
+    # # 7) no documentId and unclassified -> no-op (or queue a small sync if you prefer)
     # logger.info("ℹ️ Unclassified event without documentId; acknowledging with no action.")
     # return proc.success_response({"status": "ignored", "reason": "unclassified_no_documentId"})
 
 
-        # 6) no documentId case
+        # 7) no documentId case
     if did is None:
         logger.info(f"ℹ No documentId provided; running project-wide refresh for pid={pid}")
         try:
-            return proc.sync_documents(pid, headers)
+            return engine.sync_documents(pid, headers, full_sweep=bool(body.get("fullSweep")))
+        except DeadlineExceeded:
+            raise  # lambda_handler re-queues the event
         except Exception as e:
             logger.error(f"Project-wide sync failed for pid={pid}: {e}")
             return proc.error_response(500, f"project-wide sync failed: {e}")
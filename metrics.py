@@ -0,0 +1,156 @@
+# === metrics.py ===
+import os
+import re
+import json
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+# Emit CloudWatch Embedded Metric Format lines at the end of a sync
+FV_METRICS_EMF       = os.getenv("FV_METRICS_EMF", "false").lower() in ("1", "true", "yes")
+FV_METRICS_NAMESPACE = os.getenv("FV_METRICS_NAMESPACE", "TwoWaySync")
+
+# Latency histogram bucket upper bounds, seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_template(method: str, url: str) -> str:
+    """'GET https://x/core/folders/123/children?offset=0' -> 'GET /core/folders/{id}/children'."""
+    path = _ID_SEGMENT.sub("/{id}", urlparse(url).path or "/")
+    return f"{method.upper()} {path}"
+
+
+class _Endpoint:
+    __slots__ = ("attempts", "retries", "refresh401", "throttled429", "errors", "coalesced",
+                 "memo_hits", "statuses", "buckets", "latency_sum", "latency_max")
+
+    def __init__(self):
+        self.attempts     = 0
+        self.retries      = 0
+        self.refresh401   = 0
+        self.throttled429 = 0
+        self.errors       = 0   # network errors / timeouts (no status)
+        self.coalesced    = 0   # GETs that shared another caller's in-flight request
+        self.memo_hits    = 0   # GETs answered from the per-invocation memo
+        self.statuses: Dict[int, int] = {}
+        self.buckets      = [0] * len(LATENCY_BUCKETS)
+        self.latency_sum  = 0.0
+        self.latency_max  = 0.0
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (inf capped at the observed max)."""
+        target, seen = q * self.attempts, 0
+        for bound, n in zip(LATENCY_BUCKETS, self.buckets):
+            seen += n
+            if seen >= target and n:
+                return min(bound, self.latency_max)
+        return self.latency_max
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "refresh401": self.refresh401,
+            "throttled429": self.throttled429,
+            "errors": self.errors,
+            "coalesced": self.coalesced,
+            "memoHits": self.memo_hits,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "latencyMs": {
+                "avg": round(self.latency_sum / self.attempts * 1000, 1) if self.attempts else 0.0,
+                "p50": round(self.quantile(0.5) * 1000, 1),
+                "p90": round(self.quantile(0.9) * 1000, 1),
+                "max": round(self.latency_max * 1000, 1),
+                "buckets": {("+Inf" if b == float("inf") else str(b)): n
+                            for b, n in zip(LATENCY_BUCKETS, self.buckets)},
+            },
+        }
+
+
+class RequestMetrics:
+    """
+    Thread-safe per-endpoint counters + latency histograms.
+    Endpoints are templates ('GET /core/folders/{id}'), 'GET presigned' or 's3 put_object'.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints: Dict[str, _Endpoint] = {}
+        self._started = time.time()
+
+    def _ep(self, endpoint: str) -> _Endpoint:
+        ep = self._endpoints.get(endpoint)
+        if ep is None:
+            ep = self._endpoints[endpoint] = _Endpoint()
+        return ep
+
+    def observe(self, endpoint: str, status: Optional[int], latency: float) -> None:
+        """One attempt. status=None/0 means it failed before a response arrived."""
+        with self._lock:
+            ep = self._ep(endpoint)
+            ep.attempts += 1
+            ep.latency_sum += latency
+            ep.latency_max = max(ep.latency_max, latency)
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if latency <= bound:
+                    ep.buckets[i] += 1
+                    break
+            if not status:
+                ep.errors += 1
+                return
+            ep.statuses[status] = ep.statuses.get(status, 0) + 1
+            if status == 429:
+                ep.throttled429 += 1
+
+    def incr(self, endpoint: str, counter: str, n: int = 1) -> None:
+        """Bump 'retries', 'refresh401', 'coalesced' or 'memo_hits' for an endpoint."""
+        with self._lock:
+            ep = self._ep(endpoint)
+            setattr(ep, counter, getattr(ep, counter) + n)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._endpoints = {}
+            self._started = time.time()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "windowSeconds": round(time.time() - self._started, 3),
+                "endpoints": {name: ep.to_dict() for name, ep in sorted(self._endpoints.items())},
+            }
+
+    def emit_emf(self, dimensions: Optional[dict] = None, namespace: str = FV_METRICS_NAMESPACE) -> None:
+        """
+        Print one CloudWatch EMF line per endpoint. Uses print(), not the logger:
+        EMF lines must be bare JSON for CloudWatch to extract the metrics.
+        """
+        dims = {k: str(v) for k, v in (dimensions or {}).items()}
+        names = [("Attempts", "Count"), ("Retries", "Count"), ("Refresh401", "Count"),
+                 ("Throttled429", "Count"), ("Errors", "Count"),
+                 ("LatencyAvg", "Milliseconds"), ("LatencyP90", "Milliseconds"), ("LatencyMax", "Milliseconds")]
+        for endpoint, data in self.snapshot()["endpoints"].items():
+            lat = data["latencyMs"]
+            line = {
+                "_aws": {
+                    "Timestamp": int(time.time() * 1000),
+                    "CloudWatchMetrics": [{
+                        "Namespace": namespace,
+                        "Dimensions": [["Endpoint"] + list(dims)],
+                        "Metrics": [{"Name": n, "Unit": u} for n, u in names],
+                    }],
+                },
+                "Endpoint": endpoint,
+                **dims,
+                "Attempts": data["attempts"],
+                "Retries": data["retries"],
+                "Refresh401": data["refresh401"],
+                "Throttled429": data["throttled429"],
+                "Errors": data["errors"],
+                "LatencyAvg": lat["avg"],
+                "LatencyP90": lat["p90"],
+                "LatencyMax": lat["max"],
+            }
+            print(json.dumps(line), flush=True)
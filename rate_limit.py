@@ -0,0 +1,315 @@
+# === rate_limit.py ===
+import os
+import json
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+from deadline import Deadline, DeadlineExceeded
+from file_lock import FileLock, atomic_write
+
+logger = logging.getLogger(__name__)
+
+# Org-wide Filevine budget. Every API call takes one token.
+FV_RATE_LIMIT_RPS   = float(os.getenv("FV_RATE_LIMIT_RPS", "8"))
+FV_RATE_LIMIT_BURST = float(os.getenv("FV_RATE_LIMIT_BURST", "10"))
+# Optional state file so several local processes share one bucket (e.g. %TEMP%/fv_rate_limit.json)
+FV_RATE_LIMIT_FILE  = os.getenv("FV_RATE_LIMIT_FILE", "").strip()
+# Never honor a Retry-After longer than this
+MAX_RETRY_AFTER     = float(os.getenv("FV_MAX_RETRY_AFTER", "60"))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After is either delta-seconds or an HTTP date. Returns seconds (>= 0) or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every Filevine caller in the process (or, with
+    `state_file`, by every process on the host).
+    - acquire(): take one token, sleeping until one is available (never past a deadline)
+    - pause(seconds): stop *all* callers for a while (e.g. after a 429)
+    """
+    def __init__(self, rate: float, burst: float, state_file: Optional[str] = None):
+        self.rate       = max(rate, 0.001)
+        self.burst      = max(burst, 1.0)
+        self.state_file = state_file or None
+        self._lock      = threading.Lock()
+        self._state     = {"tokens": self.burst, "updated": time.time(), "paused_until": 0.0}
+
+    # ---- state backends ----
+    def _load(self) -> dict:
+        if not self.state_file:
+            return self._state
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"tokens": self.burst, "updated": time.time(), "paused_until": 0.0}
+
+    def _save(self, state: dict) -> None:
+        if not self.state_file:
+            self._state = state
+            return
+        try:
+            atomic_write(self.state_file, json.dumps(state).encode("utf-8"), mode=0o644)
+        except OSError as e:
+            logger.warning(f"Could not write rate-limit state {self.state_file}: {e}")
+
+    def _update(self, fn):
+        """Run fn(state, now) under the in-process lock and, if configured, the file lock."""
+        with self._lock:
+            if self.state_file:
+                with FileLock(f"{self.state_file}.lock"):
+                    state = self._load()
+                    result = fn(state, time.time())
+                    self._save(state)
+                    return result
+            state = self._load()
+            result = fn(state, time.time())
+            self._save(state)
+            return result
+
+    # ---- public API ----
+    def acquire(self, tokens: float = 1.0, deadline: Optional[Deadline] = None) -> float:
+        """
+        Reserve `tokens` and sleep until they are ours. Returns seconds waited.
+        With a deadline, a wait (token refill or a 429 pause) that would not leave time
+        for the request raises DeadlineExceeded instead, and nothing is reserved.
+        """
+        def reserve(state: dict, now: float) -> float:
+            elapsed = max(0.0, now - state["updated"])
+            available = min(self.burst, state["tokens"] + elapsed * self.rate) - tokens
+            wait = -available / self.rate if available < 0 else 0.0
+            wait = max(wait, state.get("paused_until", 0.0) - now)
+            if deadline is not None and wait > 0 and not deadline.allows(wait):
+                return -wait
+            state["tokens"] = available
+            state["updated"] = now
+            return wait
+
+        wait = self._update(reserve)
+        if wait < 0:
+            raise DeadlineExceeded(f"rate limiter wait {-wait:.2f}s exceeds the time left "
+                                   f"({deadline.remaining():.2f}s)")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def pause(self, seconds: float) -> None:
+        """Hold back every caller for `seconds` (extends, never shortens, an existing pause)."""
+        seconds = min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+        def extend(state: dict, now: float) -> None:
+            state["paused_until"] = max(state.get("paused_until", 0.0), now + seconds)
+
+        self._update(extend)
+        logger.warning(f"⏸️ Filevine rate limit: pausing all callers for {seconds:.2f}s")
+
+    def pause_from_response(self, response, default: Optional[float] = None,
+                            limit: Optional[float] = None) -> Optional[float]:
+        """
+        Apply a 429's Retry-After globally. Falls back to `default` when the header is absent;
+        `limit` caps the pause (e.g. at the invocation's remaining time).
+        """
+        headers = getattr(response, "headers", None) or {}
+        delay = parse_retry_after(headers.get("Retry-After"))
+        if delay is None:
+            delay = default
+        if delay is not None and limit is not None:
+            delay = min(delay, limit)
+        if delay is not None:
+            self.pause(delay)
+        return delay
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Process-wide limiter configured from FV_RATE_LIMIT_* env vars."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(FV_RATE_LIMIT_RPS, FV_RATE_LIMIT_BURST, FV_RATE_LIMIT_FILE)
+    return _limiter
+
+
+# ---------------------------
+# Adaptive (AIMD) concurrency
+# ---------------------------
+FV_CONCURRENCY_MIN   = int(os.getenv("FV_CONCURRENCY_MIN", "1"))
+FV_CONCURRENCY_START = int(os.getenv("FV_CONCURRENCY_START", "4"))
+FV_CONCURRENCY_MAX   = int(os.getenv("FV_CONCURRENCY_MAX", "16"))
+# Cut the limit when an endpoint's smoothed latency exceeds its baseline * this factor
+FV_LATENCY_TOLERANCE = float(os.getenv("FV_LATENCY_TOLERANCE", "2.5"))
+# Calls an endpoint needs before its latency can trigger a cut
+FV_LATENCY_WARMUP    = int(os.getenv("FV_LATENCY_WARMUP", "10"))
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD in-flight limit:
+    - each success adds 1/limit (≈ +1 per round trip of `limit` calls)
+    - 429, 5xx, network errors or latency above baseline * tolerance multiply it by `decrease`
+    Latency is judged per endpoint (a folder GET and a document listing cost very different
+    amounts) against a baseline that follows fast samples only part of the way, after
+    `FV_LATENCY_WARMUP` calls; latency_tolerance=None makes the controller status-only
+    (transfers, whose latency is mostly body size).
+    Cuts are spaced by at least one smoothed round trip, so a burst of 429s
+    from the same wave of requests counts as one congestion signal.
+    """
+    def __init__(self, name: str, min_limit: int = FV_CONCURRENCY_MIN,
+                 initial: int = FV_CONCURRENCY_START, max_limit: int = FV_CONCURRENCY_MAX,
+                 decrease: float = 0.5, latency_tolerance: Optional[float] = FV_LATENCY_TOLERANCE,
+                 warmup: int = FV_LATENCY_WARMUP):
+        self.name              = name
+        self.min_limit         = max(1, min_limit)
+        self.max_limit         = max(self.min_limit, max_limit)
+        self.limit             = float(min(max(initial, self.min_limit), self.max_limit))
+        self.decrease          = decrease
+        self.latency_tolerance = latency_tolerance
+        self.warmup            = max(1, warmup)
+        self.in_flight         = 0
+        self.adjustments       = deque(maxlen=20)  # (unix_ts, old, new, reason)
+        self._cond             = threading.Condition()
+        self._latency: Dict[str, list] = {}        # endpoint -> [baseline, smoothed, samples]
+        self._smoothed: Optional[float] = None     # EWMA of recent latency, all endpoints (cut spacing)
+        self._last_cut         = 0.0
+
+    @contextmanager
+    def slot(self):
+        """Hold one in-flight slot for the duration of a call."""
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                self._cond.notify()
+
+    def record(self, status: int, latency: float, endpoint: str = "*") -> None:
+        """Feed back one call's outcome. status=0 means a network error/timeout."""
+        with self._cond:
+            self._smoothed = latency if self._smoothed is None else 0.7 * self._smoothed + 0.3 * latency
+            slow = None
+            if self.latency_tolerance is not None:
+                stats = self._latency.get(endpoint)
+                if stats is None:
+                    stats = self._latency[endpoint] = [latency, latency, 0]
+                baseline, smoothed, samples = stats
+                smoothed = 0.7 * smoothed + 0.3 * latency
+                if latency < baseline:
+                    baseline += 0.3 * (latency - baseline)   # one fast outlier doesn't reset it
+                else:
+                    baseline += 0.01 * (latency - baseline)  # drift up slowly
+                stats[:] = [baseline, smoothed, samples + 1]
+                if samples + 1 >= self.warmup and smoothed > baseline * self.latency_tolerance and smoothed > 0.05:
+                    slow = f"{endpoint} latency {smoothed:.2f}s > {baseline:.2f}s x{self.latency_tolerance}"
+
+            if status == 0 or status == 429 or status >= 500:
+                self._cut(f"status {status or 'error'}")
+            elif slow:
+                self._cut(slow)
+            elif self.limit < self.max_limit:
+                old = int(self.limit)
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                if int(self.limit) > old:
+                    self._note(old, "success")
+                    self._cond.notify_all()
+
+    def _cut(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_cut < (self._smoothed or 0.0):
+            return
+        old = int(self.limit)
+        self.limit = max(float(self.min_limit), self.limit * self.decrease)
+        self._last_cut = now
+        if int(self.limit) != old:
+            self._note(old, reason)
+            logger.warning(f"📉 {self.name} concurrency {old} → {int(self.limit)} ({reason})")
+
+    def _note(self, old: int, reason: str) -> None:
+        self.adjustments.append((round(time.time(), 3), old, int(self.limit), reason))
+
+    def snapshot(self) -> dict:
+        """Current limit and recent adjustments, for logging."""
+        with self._cond:
+            return {
+                "name": self.name,
+                "limit": int(self.limit),
+                "inFlight": self.in_flight,
+                "smoothedLatency": round(self._smoothed or 0.0, 3),
+                "endpointLatency": {ep: {"baseline": round(b, 3), "smoothed": round(s, 3)}
+                                    for ep, (b, s, _) in self._latency.items()},
+                "recentAdjustments": list(self.adjustments),
+            }
+
+
+# ---------------------------
+# Adaptive (AIMD) batch size
+# ---------------------------
+class AdaptiveBatchSize:
+    """
+    AIMD items-per-request for batch endpoints:
+    - each throttle-free batch adds `step` (up to max_size)
+    - a batch that saw a 429 multiplies the size by `decrease` (down to min_size)
+    Cuts are spaced like AdaptiveConcurrency's: concurrent batches throttled by the
+    same wave count once.
+    """
+    def __init__(self, name: str, min_size: int = 1, initial: int = 10, max_size: int = 100,
+                 step: int = 5, decrease: float = 0.5, cooldown: float = 1.0):
+        self.name        = name
+        self.min_size    = max(1, min_size)
+        self.max_size    = max(self.min_size, max_size)
+        self.size        = min(max(initial, self.min_size), self.max_size)
+        self.step        = max(1, step)
+        self.decrease    = decrease
+        self.cooldown    = cooldown
+        self.adjustments = deque(maxlen=20)  # (unix_ts, old, new, reason)
+        self._lock       = threading.Lock()
+        self._last_cut   = 0.0
+
+    def current(self) -> int:
+        with self._lock:
+            return self.size
+
+    def record(self, throttled: bool) -> None:
+        """Feed back one batch: throttled=True if any of its attempts got a 429."""
+        with self._lock:
+            old = self.size
+            if throttled:
+                now = time.monotonic()
+                if now - self._last_cut < self.cooldown:
+                    return
+                self._last_cut = now
+                self.size = max(self.min_size, int(self.size * self.decrease))
+                if self.size != old:
+                    logger.warning(f"📉 {self.name} batch size {old} → {self.size} (429)")
+            else:
+                self.size = min(self.max_size, self.size + self.step)
+            if self.size != old:
+                self.adjustments.append((round(time.time(), 3), old, self.size, "429" if throttled else "success"))
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"name": self.name, "size": self.size, "recentAdjustments": list(self.adjustments)}
@@ -0,0 +1,99 @@
+# === retry.py ===
+import os
+import random
+import logging
+import threading
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Attempts per logical operation (first try included)
+RETRY_MAX_ATTEMPTS = int(os.getenv("FV_RETRY_MAX_ATTEMPTS", "6"))
+RETRY_BASE_DELAY   = float(os.getenv("FV_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY    = float(os.getenv("FV_RETRY_MAX_DELAY", "8"))
+# Retry budget: starts full at RETRY_BUDGET_MIN tokens, each first attempt earns
+# RETRY_BUDGET_RATIO of a token back (up to the cap), each retry spends one
+RETRY_BUDGET_MIN   = float(os.getenv("FV_RETRY_BUDGET_MIN", "20"))
+RETRY_BUDGET_RATIO = float(os.getenv("FV_RETRY_BUDGET_RATIO", "0.2"))
+
+
+class RetryBudget:
+    """
+    Token bucket for retries across one sync. While calls mostly succeed the
+    budget keeps up; during an outage it drains and retries stop, so load
+    falls back to roughly one attempt per operation instead of multiplying.
+    """
+    def __init__(self, initial: float = RETRY_BUDGET_MIN, ratio: float = RETRY_BUDGET_RATIO):
+        self.initial = initial
+        self.ratio   = ratio
+        self._lock   = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.tokens    = self.initial
+            self.spent     = 0
+            self.exhausted = 0   # retries refused because the budget was empty
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.tokens = min(self.initial, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self.tokens < 1.0:
+                self.exhausted += 1
+                return False
+            self.tokens -= 1.0
+            self.spent += 1
+            return True
+
+    def available(self) -> bool:
+        with self._lock:
+            return self.tokens >= 1.0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {"tokens": round(self.tokens, 2), "spent": self.spent, "exhausted": self.exhausted}
+
+
+class RetryPolicy:
+    """
+    The one place that decides whether a failed attempt is retried and how long to wait.
+    Only the innermost request layer loops; callers above it make a single call per
+    logical operation and handle the final failure.
+    """
+    def __init__(self, max_attempts: int = RETRY_MAX_ATTEMPTS, base: float = RETRY_BASE_DELAY,
+                 cap: float = RETRY_MAX_DELAY, budget: Optional[RetryBudget] = None):
+        self.max_attempts = max(1, max_attempts)
+        self.base         = base
+        self.cap          = cap
+        self.budget       = budget or RetryBudget()
+
+    @staticmethod
+    def retryable(exc: BaseException) -> bool:
+        """429/5xx and network errors are transient; other HTTP errors are not."""
+        if isinstance(exc, requests.HTTPError):
+            code = exc.response.status_code if exc.response is not None else 0
+            return code == 429 or 500 <= code < 600
+        return isinstance(exc, (requests.ConnectionError, requests.Timeout,
+                                requests.exceptions.ChunkedEncodingError))
+
+    def started(self) -> None:
+        """Count a first attempt (earns budget)."""
+        self.budget.deposit()
+
+    def allow(self, attempt: int, exc: BaseException) -> bool:
+        """May attempt `attempt` (0-based) be followed by another one?"""
+        if attempt + 1 >= self.max_attempts or not self.retryable(exc):
+            return False
+        if not self.budget.withdraw():
+            logger.warning(f"Retry budget exhausted; not retrying ({exc})")
+            return False
+        return True
+
+    def delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter. attempt: 0,1,2,..."""
+        return min(self.cap, self.base * (2 ** attempt)) + random.uniform(0, 0.25)
@@ -0,0 +1,89 @@
+# === single_flight.py ===
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent calls and memoize their results briefly.
+    - do(key, fn): if a call for `key` is already running, wait for it and share
+      its result (or exception) instead of starting another one.
+    - results accepted by `cacheable` are served from memory for `ttl` seconds;
+      at most `max_entries` are kept (least recently used go first).
+    """
+    def __init__(self, ttl: float = 30.0, max_entries: int = 1024):
+        self.ttl         = ttl
+        self.max_entries = max(1, max_entries)
+        self._lock       = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._memo: "OrderedDict[Hashable, Tuple[float, object]]" = OrderedDict()
+        self.calls      = 0   # network calls actually made
+        self.coalesced  = 0   # callers that waited on someone else's call
+        self.memo_hits  = 0   # callers served from the memo
+
+    def do(self, key: Hashable, fn: Callable[[], object],
+           cacheable: Optional[Callable[[object], bool]] = None) -> Tuple[object, str]:
+        """Returns (value, how) where how is 'call', 'coalesced' or 'memo'."""
+        with self._lock:
+            hit = self._memo.get(key)
+            if hit is not None:
+                if hit[0] > time.monotonic():
+                    self.memo_hits += 1
+                    self._memo.move_to_end(key)
+                    return hit[1], "memo"
+                del self._memo[key]
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+                self.calls += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, "coalesced"
+
+        try:
+            call.value = fn()
+            if self.ttl > 0 and (cacheable is None or cacheable(call.value)):
+                with self._lock:
+                    self._memo[key] = (time.monotonic() + self.ttl, call.value)
+                    self._memo.move_to_end(key)
+                    while len(self._memo) > self.max_entries:
+                        self._memo.popitem(last=False)
+            return call.value, "call"
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+
+    def forget(self, key: Hashable) -> None:
+        with self._lock:
+            self._memo.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop memoized results (in-flight calls are unaffected)."""
+        with self._lock:
+            self._memo.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "coalesced": self.coalesced,
+                    "memoHits": self.memo_hits, "memoized": len(self._memo)}
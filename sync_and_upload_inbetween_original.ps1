@@ -20,6 +20,8 @@ $PythonUploader       = "C:\Kritagya Folder\Two way sync\fv_uploader_inbetween_o
 $ProjectMapPath       = "C:\Kritagya Folder\FileVineBI\project_map.json"
 $TempS3List           = "$env:TEMP\s3_file_list.txt"
 $EnableFilevineUpload = $true               # set $false to silence FV uploads
+$env:FV_TOKEN_STORE    = "$env:TEMP\fv_token.json"  # share one Filevine session across uploader runs
+$env:FV_RATE_LIMIT_FILE = "$env:TEMP\fv_rate_limit.json"  # uploader runs share the org's request budget
 
 # Ignore patterns (filenames only)
 $IgnoreGlobs = @(
@@ -0,0 +1,146 @@
+# === sync_state.py ===
+import os
+import re
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from http_cache import DiskStore, S3Store
+
+logger = logging.getLogger(__name__)
+
+# "full": every sync transfers every document; "incremental": only documents modified
+# since the project's watermark, with a periodic full sweep as the fallback
+SYNC_MODE            = os.getenv("FV_SYNC_MODE", "full").strip().lower()
+# Re-check documents modified this long before the watermark (clock skew, late index updates)
+SYNC_OVERLAP_SECONDS = float(os.getenv("FV_SYNC_OVERLAP_SECONDS", "3600"))
+# An incremental project still gets a full sweep when the last one is older than this
+FULL_SWEEP_INTERVAL  = float(os.getenv("FV_FULL_SWEEP_INTERVAL", "86400"))
+# Where watermarks live: "s3" (sync bucket), "file" (FV_SYNC_STATE_DIR) or "off"
+SYNC_STATE_STORE     = os.getenv("FV_SYNC_STATE_STORE", "s3").strip().lower()
+SYNC_STATE_DIR       = os.getenv("FV_SYNC_STATE_DIR", "").strip()
+# Outside S3_PREFIX so the Z: drive mirror never sees it
+SYNC_STATE_S3_PREFIX = os.getenv("FV_SYNC_STATE_S3_PREFIX", "_sync_cache/sync-state/")
+
+SYNC_STATE_VERSION = 1
+
+_LONG_FRACTION = re.compile(r"(\.\d{6})\d+")  # .NET emits 7 fractional digits
+
+
+def parse_modified(value) -> Optional[float]:
+    """Filevine modifiedDate/uploadDate (ISO 8601) -> unix time; None if missing or unparseable."""
+    if not value:
+        return None
+    text = _LONG_FRACTION.sub(r"\1", str(value).strip()).replace("Z", "+00:00")
+    try:
+        dt = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class SyncState:
+    """
+    Incremental sync bookkeeping for one project.
+    - watermark: newest document modified date (Filevine's clock) of the last successful sync
+    - cutoff(): documents modified before this are skipped; None means a full sweep
+    - observe()/changed(): called for every listed document during a sync
+    - commit(): after a sync that listed every document and transferred every selected one
+    """
+    def __init__(self, project_id: int, watermark: Optional[float] = None,
+                 last_success: float = 0.0, last_full: float = 0.0):
+        self.project_id   = project_id
+        self.watermark    = watermark
+        self.last_success = last_success   # unix time of the last successful sync
+        self.last_full    = last_full      # unix time of the last successful full sweep
+        self.newest: Optional[float] = None
+        self.listed = 0
+        self.incomplete = False            # a listing page failed: this sync saw only part of the project
+
+    def cutoff(self, force_full: bool = False, now: Optional[float] = None) -> Optional[float]:
+        if force_full or SYNC_MODE != "incremental" or self.watermark is None:
+            return None
+        if (now or time.time()) - self.last_full > FULL_SWEEP_INTERVAL:
+            return None
+        return self.watermark - SYNC_OVERLAP_SECONDS
+
+    def observe(self, modified) -> Optional[float]:
+        ts = parse_modified(modified)
+        self.listed += 1
+        if ts is not None and (self.newest is None or ts > self.newest):
+            self.newest = ts
+        return ts
+
+    def changed(self, modified, cutoff: Optional[float]) -> bool:
+        """Transfer this document? Undated documents always are."""
+        ts = self.observe(modified)
+        return cutoff is None or ts is None or ts >= cutoff
+
+    def listing_failed(self, exc: BaseException) -> None:
+        """on_error hook for the document listing; an incomplete listing never advances the watermark."""
+        self.incomplete = True
+
+    def commit(self, full: bool, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        if self.newest is not None:
+            self.watermark = max(self.watermark or self.newest, self.newest)
+        self.last_success = now
+        if full:
+            self.last_full = now
+
+    # ---- persistence ----
+    def to_record(self) -> dict:
+        return {
+            "version": SYNC_STATE_VERSION,
+            "projectId": self.project_id,
+            "watermark": self.watermark,
+            "lastSuccess": self.last_success,
+            "lastFullSweep": self.last_full,
+        }
+
+    @classmethod
+    def from_record(cls, project_id: int, record: Optional[dict]) -> "SyncState":
+        if not record or record.get("version") != SYNC_STATE_VERSION or record.get("projectId") != project_id:
+            return cls(project_id)
+        return cls(project_id, record.get("watermark"),
+                   float(record.get("lastSuccess") or 0.0), float(record.get("lastFullSweep") or 0.0))
+
+
+class SyncStateStore:
+    """Loads/saves SyncState records through a DiskStore or S3Store."""
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def _key(project_id: int) -> str:
+        return f"project-{int(project_id)}"
+
+    def load(self, project_id: int) -> SyncState:
+        try:
+            record = self.backend.get(self._key(project_id))
+        except Exception as e:
+            logger.warning(f"Sync state load failed for project {project_id}: {e}")
+            record = None
+        return SyncState.from_record(project_id, record)
+
+    def save(self, state: SyncState) -> bool:
+        try:
+            self.backend.put(self._key(state.project_id), state.to_record())
+            return True
+        except Exception as e:
+            logger.warning(f"Sync state save failed for project {state.project_id}: {e}")
+            return False
+
+
+def build_sync_state_store(s3_call: Optional[Callable] = None, bucket: Optional[str] = None) -> Optional[SyncStateStore]:
+    """From FV_SYNC_STATE_STORE; None unless FV_SYNC_MODE=incremental and the store is configurable."""
+    if SYNC_MODE != "incremental":
+        return None
+    if SYNC_STATE_STORE == "file" and SYNC_STATE_DIR:
+        return SyncStateStore(DiskStore(SYNC_STATE_DIR))
+    if SYNC_STATE_STORE == "s3" and s3_call and bucket:
+        return SyncStateStore(S3Store(s3_call, bucket, SYNC_STATE_S3_PREFIX))
+    return None
@@ -2,17 +2,32 @@
 import os
 import re
 import time
-import random
 import json
 import logging
+import queue
 import mimetypes
-from typing import Dict, List, Optional, Tuple, Set, Deque
+import threading
 from collections import deque
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Set
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from urllib.parse import urlencode
 
-import boto3
 import requests
-from botocore.exceptions import ClientError
+from requests.adapters import HTTPAdapter
+from botocore.exceptions import ClientError  # light; boto3 itself is imported lazily
+
+from deadline import Deadline, DeadlineExceeded
+from doc_record import DocPaths, DocRecord
+from fast_json import parse_listing, response_json
+from folder_store import FolderMapCache, ProjectFolderMap, build_folder_map_store
+from folder_tree import FolderTree
+from http_cache import HTTP_CACHE_ENABLED, HttpCache, build_store
+from metrics import FV_METRICS_EMF, RequestMetrics, endpoint_template
+from rate_limit import (FV_CONCURRENCY_MAX, MAX_RETRY_AFTER, AdaptiveBatchSize, AdaptiveConcurrency,
+                        get_rate_limiter, parse_retry_after)
+from retry import RetryPolicy
+from single_flight import SingleFlight
+from sync_state import SyncState, build_sync_state_store
 
 # ---------------------------
 # Logging
@@ -35,6 +50,44 @@ S3_PREFIX = os.getenv("S3_PREFIX", "lojedemofolder/")  # project folder is appen
 S3_PUBLIC_READ = os.getenv("S3_PUBLIC_READ", "false").lower() in ("1", "true", "yes")
 FV_PAGE_LIMIT  = int(os.getenv("FV_PAGE_LIMIT", "500"))  # for folder/doc listings
 
+# Warm-container reuse: how long cached state may be served before it is rebuilt
+FOLDER_CACHE_TTL = int(os.getenv("FOLDER_CACHE_TTL", "900"))     # project folder maps
+PROJECT_NAME_TTL = int(os.getenv("PROJECT_NAME_TTL", "3600"))    # projectId -> name
+HTTP_SESSION_TTL = int(os.getenv("HTTP_SESSION_TTL", "1800"))    # pooled TLS connections
+
+# Presigned storage transfers (separate connection pool from the Filevine API)
+TRANSFER_CONCURRENCY    = int(os.getenv("FV_TRANSFER_CONCURRENCY", "16"))
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "5"))
+STORAGE_READ_TIMEOUT    = float(os.getenv("STORAGE_READ_TIMEOUT", "60"))
+
+# Folder-tree crawl: children of every folder in a BFS level are listed concurrently
+CRAWL_CONCURRENCY = int(os.getenv("FV_CRAWL_CONCURRENCY", "8"))
+
+# Identical Filevine GETs share one in-flight call; results are reused for this many seconds
+GET_MEMO_TTL = float(os.getenv("FV_GET_MEMO_TTL", "30"))
+GET_MEMO_MAX = int(os.getenv("FV_GET_MEMO_MAX", "1024"))
+# Only small metadata that one sync asks for repeatedly goes through coalescing/memo;
+# listing pages and document metadata are read once, so holding them would only cost memory
+COALESCED_GETS = frozenset({"GET /core/projects/{id}", "GET /core/folders/{id}"})
+# Endpoints revalidated through the ETag cache: metadata that rarely changes between syncs
+HTTP_CACHED_GETS = COALESCED_GETS | {"GET /core/folders/{id}/children"}
+
+# Pipelined full sync: listing pages flow into path mapping, link fetches and transfers
+# through bounded queues, so uploads start with the first page and memory stays flat
+SYNC_PIPELINE       = os.getenv("FV_SYNC_PIPELINE", "false").lower() in ("1", "true", "yes")
+PIPELINE_LINK_BATCH = int(os.getenv("FV_PIPELINE_LINK_BATCH", "50"))   # docs per download-link lookup
+PIPELINE_QUEUE_SIZE = int(os.getenv("FV_PIPELINE_QUEUE_SIZE", "4"))    # link batches buffered per stage
+
+# Document listing pages requested ahead of the one being consumed (1 = strictly one at a time)
+LIST_PREFETCH = int(os.getenv("FV_LIST_PREFETCH", "4"))
+
+# Download links: /batch/download chunks run concurrently; the chunk size grows while calls
+# succeed and halves on 429s. Ids a chunk didn't return are retried in regrouped chunks.
+LINK_BATCH_CONCURRENCY = int(os.getenv("FV_LINK_BATCH_CONCURRENCY", "4"))
+LINK_BATCH_START       = int(os.getenv("FV_LINK_BATCH_START", "10"))
+LINK_BATCH_MAX         = int(os.getenv("FV_LINK_BATCH_MAX", "50"))
+LINK_RETRY_ROUNDS      = int(os.getenv("FV_LINK_RETRY_ROUNDS", "1"))   # extra tries per missing id
+
 
 # Helpful MIME additions
 mimetypes.add_type('application/pdf', '.pdf')
@@ -49,6 +102,42 @@ mimetypes.add_type('text/csv', '.csv')
 # ---------------------------
 
 
+# Process-wide boto3 clients, reused across warm Lambda invocations
+_clients: Dict[str, object] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(service: str):
+    """
+    Return a shared boto3 client for `service`, creating it on first use.
+    boto3 is imported here so invocations that never touch AWS skip its import cost.
+    """
+    client = _clients.get(service)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(service)
+            if client is None:
+                t0 = time.perf_counter()
+                import boto3
+                client = _clients[service] = boto3.client(service)
+                logger.info(f"boto3 '{service}' client ready in {(time.perf_counter() - t0) * 1000:.0f} ms")
+    return client
+
+
+def pooled_session(pool_size: int) -> requests.Session:
+    """
+    requests.Session whose keep-alive pool holds `pool_size` connections per host.
+    pool_block=True makes extra callers wait for a connection instead of opening
+    (and then discarding) throwaway TLS connections.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(1, pool_size), pool_block=True, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["Connection"] = "keep-alive"
+    return session
+
+
 def _guess_content_type(filename: str) -> str:
     ctype, _ = mimetypes.guess_type(filename)
     if ctype:
@@ -116,6 +205,30 @@ def _extract_parent_id_from_folder_payload(data: dict) -> Optional[int]:
     return None
 
 
+def _pick_folder_id(item: dict) -> Optional[int]:
+    """Listing item -> folderId (None to skip)."""
+    fid = (item.get("folderId") or {}).get("native")
+    return int(fid) if fid else None
+
+
+def _pick_child(item: dict) -> Optional[Tuple[int, Optional[str]]]:
+    """Children listing item -> (folderId, name or None)."""
+    cid = (item.get("folderId") or {}).get("native")
+    return (int(cid), item.get("name")) if cid else None
+
+
+def _pick_link(item: dict) -> Tuple[Optional[int], Optional[str]]:
+    """Batch download item -> (documentId or None, downloadLink or None)."""
+    raw = item.get("documentId")
+    if isinstance(raw, dict):
+        raw = raw.get("native")
+    try:
+        doc_id = int(raw) if raw is not None else None
+    except (TypeError, ValueError):
+        doc_id = None
+    return doc_id, item.get("downloadLink")
+
+
 class DocumentProcessor:
     """
     Full sync that mirrors Filevine’s folder structure in S3:
@@ -124,26 +237,126 @@ class DocumentProcessor:
     - Creates S3 placeholders for every path, then uploads docs to the exact path.
     - Single-doc webhook upload & delete supported.
     """
-    def _sleep_backoff(self, attempt: int, base: float = 0.5, cap: float = 8.0):
+    def _backoff_after(self, response, attempt: int, global_pause: bool = True) -> None:
+        """429 pauses every caller via the shared limiter; anything else backs off locally."""
+        delay = min(self.retry.delay(attempt), self.deadline.remaining())
+        if global_pause and response is not None and response.status_code == 429:
+            self.limiter.pause_from_response(response, default=delay, limit=self.deadline.remaining())
+        else:
+            logger.warning(f"Backing off {delay:.2f}s (attempt {attempt+1})")
+            time.sleep(delay)
+
+    def _retry_wait(self, endpoint: str, attempt: int, exc: BaseException, global_pause: bool = True) -> bool:
         """
-        Exponential backoff with full jitter.
-        attempt: 0,1,2,...
+        Ask the retry policy whether `exc` on `attempt` gets another try.
+        If so, back off and return True; False means give up and raise.
+        Raises DeadlineExceeded when the backoff would not leave time for another attempt.
         """
-        delay = min(cap, base * (2 ** attempt)) + random.uniform(0, 0.25)
-        logger.warning(f"Backing off {delay:.2f}s (attempt {attempt+1})")
-        time.sleep(delay)
+        if not self.retry.allow(attempt, exc):
+            return False
+        wait = self.retry.delay(attempt)
+        response = getattr(exc, "response", None)
+        if global_pause and response is not None and response.status_code == 429:
+            # The server's Retry-After, not our backoff, decides when the retry can go out
+            retry_after = parse_retry_after((getattr(response, "headers", None) or {}).get("Retry-After"))
+            wait = max(wait, min(retry_after or 0.0, MAX_RETRY_AFTER))
+        if not self.deadline.allows(wait):
+            raise DeadlineExceeded(f"no time left to retry {endpoint} ({exc})") from exc
+        self._backoff_after(getattr(exc, "response", None), attempt, global_pause)
+        self.metrics.incr(endpoint, "retries")
+        return True
 
     def __init__(self):
-        self.s3       = boto3.client("s3")
         self.bucket   = S3_BUCKET
         self.prefix   = S3_PREFIX
         self.base_url = BASE_URL
 
-        # cache: folderId -> "full/path"
-        self.folder_cache: Dict[int, str] = {}
-
-        # HTTP session for reuse
-        self.http = requests.Session()
+        # Durable {folderId: (name, parentId)} per project (S3 object or local file), see folder_store.py;
+        # the active project's map answers folderId -> path lookups (folder_tree property)
+        self.folder_store = build_folder_map_store(self._s3_call, S3_BUCKET)
+        # Loaded maps: LRU by project, bounded by total folders (FV_FOLDER_CACHE_MAX_*)
+        self.folder_maps  = FolderMapCache(on_evict=self._save_folder_map)
+        self._active_map: Optional[ProjectFolderMap] = None
+        # Folders learned before any project map is active
+        self._loose_folders = FolderTree()
+        self._folder_cache_born = time.monotonic()
+
+        # cache: projectId -> (name, fetched_at)
+        self.project_names: Dict[int, Tuple[str, float]] = {}
+
+        # HTTP sessions for reuse: Filevine API, and presigned storage links (big bodies)
+        self.http         = pooled_session(FV_CONCURRENCY_MAX)
+        self.storage_http = pooled_session(TRANSFER_CONCURRENCY)
+        self._http_born   = time.monotonic()
+
+        # Shared Filevine request budget (honors Retry-After for every caller)
+        self.limiter = get_rate_limiter()
+
+        # AIMD in-flight limits: Filevine API calls and presigned file downloads
+        self.concurrency          = AdaptiveConcurrency("filevine-api")
+        # Transfers are status-only: their latency is mostly file size, not congestion
+        self.transfer_concurrency = AdaptiveConcurrency("transfers", max_limit=TRANSFER_CONCURRENCY,
+                                                        latency_tolerance=None)
+        # Ids per /batch/download call, learned across calls
+        self.link_batch           = AdaptiveBatchSize("download-links", initial=LINK_BATCH_START,
+                                                      max_size=LINK_BATCH_MAX)
+
+        # Per-endpoint attempts/retries/401s/429s + latency histograms (reset per sync)
+        self.metrics = RequestMetrics()
+
+        # Attempts per operation + retry budget, shared by every request layer (budget reset per sync)
+        self.retry = RetryPolicy()
+
+        # Invocation deadline; lambda_handler replaces it with one built from the Lambda context
+        self.deadline = Deadline()
+
+        # Per-project modified-date watermark for FV_SYNC_MODE=incremental (None in full mode)
+        self.sync_state_store = build_sync_state_store(self._s3_call, S3_BUCKET)
+
+        # Coalesces concurrent identical GETs; memo is cleared per invocation
+        self.get_flight = SingleFlight(ttl=GET_MEMO_TTL, max_entries=GET_MEMO_MAX)
+
+        # ETag/Last-Modified cache under _get (survives warm invocations; optional disk/S3 tier)
+        self.http_cache = HttpCache(store=build_store(self._s3_call, S3_BUCKET)) if HTTP_CACHE_ENABLED else None
+
+    @property
+    def folder_tree(self) -> FolderTree:
+        """Where folder lookups and discoveries go: the active project's map if there is one."""
+        return self._active_map if self._active_map is not None else self._loose_folders
+
+    @property
+    def s3(self):
+        """Shared S3 client, created on first use."""
+        return get_client("s3")
+
+    def expire_stale_caches(self) -> None:
+        """
+        Drop cached state that is past its TTL. Called at the start of every
+        invocation when the processor is reused by a warm Lambda container.
+        """
+        now = time.monotonic()
+        self.get_flight.clear()
+        self.retry.budget.reset()
+        # Project maps older than the TTL are saved and reloaded from the store on next
+        # use: other containers may have updated them
+        if self.folder_maps.expire(FOLDER_CACHE_TTL):
+            logger.info(f"Folder maps expired; cache now {self.folder_maps.stats()}")
+        if self._active_map is not None and self._active_map.project_id not in self.folder_maps:
+            self._active_map = None
+        if now - self._folder_cache_born > FOLDER_CACHE_TTL:
+            self._loose_folders.clear()
+            self._folder_cache_born = now
+        self.project_names = {
+            pid: entry for pid, entry in self.project_names.items()
+            if now - entry[1] <= PROJECT_NAME_TTL
+        }
+        if now - self._http_born > HTTP_SESSION_TTL:
+            logger.info("HTTP sessions expired; reopening pooled connections.")
+            self.http.close()
+            self.storage_http.close()
+            self.http         = pooled_session(FV_CONCURRENCY_MAX)
+            self.storage_http = pooled_session(TRANSFER_CONCURRENCY)
+            self._http_born   = now
 
     # ---------------------------
     # Request layer with 401 refresh
@@ -154,15 +367,18 @@ class DocumentProcessor:
         Returns True if refreshed; False otherwise.
         """
         try:
-            from auth_refresh import get_dynamic_headers
+            from auth_refresh import get_dynamic_headers, invalidate_token_cache
         except Exception:
             logger.error("Token refresh module (auth_refresh) not available.")
             return False
 
         try:
+            # Force the shared token cache to drop the token that just got a 401
+            stale = (headers.get("Authorization") or "").replace("Bearer ", "", 1) or None
+            invalidate_token_cache(stale)
             new_headers = get_dynamic_headers()
             if isinstance(new_headers, dict) and new_headers:
-                headers.clear()
+                # update() rather than clear()+update(): other threads may be reading these headers
                 headers.update(new_headers)
                 logger.info("🔄 Refreshed Filevine headers after 401.")
                 return True
@@ -186,53 +402,147 @@ class DocumentProcessor:
     #                 r2.raise_for_status()
     #                 return r2
     #         raise
-    def _request(self, method: str, url: str, headers: dict, **kwargs) -> requests.Response:
+    def _request(self, method: str, url: str, headers: dict, *,
+                 conditional: Optional[Dict[str, str]] = None,
+                 on_status: Optional[Callable[[int], None]] = None, **kwargs) -> requests.Response:
         """
-        Make a request with retries:
+        Make a request with retries (`conditional` headers ride on top of the auth headers;
+        `on_status` sees the status of every failed attempt, retried or not):
+        - Every attempt takes a token from the shared rate limiter
         - On 401: refresh headers once, then retry immediately
-        - On 429/5xx or network errors: exponential backoff + jitter
+        - On 429: pause all callers for Retry-After (or the backoff delay)
+        - On 5xx or network errors: exponential backoff + jitter
+        Attempt count and the retry budget come from self.retry.
         """
-        MAX_RETRIES = 5
         attempt = 0
         refreshed = False
+        endpoint = endpoint_template(method, url)
+        self.retry.started()
 
         while True:
             try:
-                r = self.http.request(method, url, headers=headers, **kwargs)
+                send_headers = {**headers, **conditional} if conditional else headers
+                r = self._send(self.concurrency, endpoint, method, url, headers=send_headers, **kwargs)
                 r.raise_for_status()
                 return r
             except requests.HTTPError as e:
                 code = e.response.status_code if e.response is not None else 0
+                if on_status is not None:
+                    on_status(code)
 
                 # One-time token refresh on 401
                 if code == 401 and not refreshed:
                     logger.error(f"401 Unauthorized for {url}. Attempting token refresh…")
                     refreshed = self._refresh_headers_inplace(headers)
                     if refreshed:
+                        self.metrics.incr(endpoint, "refresh401")
                         continue  # try again immediately with new headers
 
-                # Backoff on 429 / 5xx
-                if code == 429 or 500 <= code < 600:
-                    if attempt >= MAX_RETRIES:
-                        raise
-                    self._sleep_backoff(attempt)
+                # 429 (global pause) / 5xx (local backoff); other HTTP errors bubble up
+                if self._retry_wait(endpoint, attempt, e):
                     attempt += 1
                     continue
-
-                # Other HTTP errors: bubble up
                 raise
             except (requests.ConnectionError, requests.Timeout) as e:
-                if attempt >= MAX_RETRIES:
-                    raise
-                self._sleep_backoff(attempt)
-                attempt += 1
-                continue
+                if self._retry_wait(endpoint, attempt, e):
+                    attempt += 1
+                    continue
+                raise
 
-    def _get(self, url: str, headers: dict, timeout: int = 15) -> requests.Response:
-        return self._request("GET", url, headers, timeout=timeout)
+    def _send(self, controller: AdaptiveConcurrency, endpoint: str, method: str, url: str, *,
+              session: Optional[requests.Session] = None, rate_limited: bool = True,
+              **kwargs) -> requests.Response:
+        """
+        One HTTP attempt inside an AIMD slot. Status + latency feed both the
+        controller and the per-endpoint metrics.
+        """
+        with controller.slot():
+            if rate_limited:
+                self.limiter.acquire(deadline=self.deadline)
+            kwargs["timeout"] = self.deadline.timeout(kwargs.get("timeout"), endpoint)
+            t0 = time.monotonic()
+            try:
+                r = (session or self.http).request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                elapsed = time.monotonic() - t0
+                controller.record(0, elapsed, endpoint)
+                self.metrics.observe(endpoint, 0, elapsed)
+                raise
+            elapsed = time.monotonic() - t0
+            controller.record(r.status_code, elapsed, endpoint)
+            self.metrics.observe(endpoint, r.status_code, elapsed)
+            return r
+
+    def _s3_call(self, op: str, **kwargs):
+        """Call an S3 client method, recording it under 's3 <op>' in the request metrics."""
+        self.deadline.check(f"s3 {op}")
+        status = 0
+        t0 = time.monotonic()
+        try:
+            out = getattr(self.s3, op)(**kwargs)
+            status = (out.get("ResponseMetadata") or {}).get("HTTPStatusCode", 200)
+            return out
+        except ClientError as e:
+            status = (e.response.get("ResponseMetadata") or {}).get("HTTPStatusCode", 0)
+            raise
+        finally:
+            self.metrics.observe(f"s3 {op}", status, time.monotonic() - t0)
+
+    def _download(self, url: str) -> requests.Response:
+        """GET a presigned file link on the storage pool, retrying transient errors (429/5xx/network)."""
+        attempt = 0
+        self.retry.started()
+        while True:
+            try:
+                resp = self._send(self.transfer_concurrency, "GET presigned", "GET", url,
+                                  session=self.storage_http, rate_limited=False,
+                                  timeout=(STORAGE_CONNECT_TIMEOUT, STORAGE_READ_TIMEOUT))
+                resp.raise_for_status()
+                return resp
+            except requests.RequestException as e:
+                # Storage 429s are not Filevine's: back off locally, don't pause the API limiter
+                if self._retry_wait("GET presigned", attempt, e, global_pause=False):
+                    attempt += 1
+                    continue
+                raise
 
-    def _post(self, url: str, headers: dict, json_body: dict, timeout: int = 15) -> requests.Response:
-        return self._request("POST", url, headers, json=json_body, timeout=timeout)
+    def _get(self, url: str, headers: dict, timeout: int = 15) -> requests.Response:
+        """
+        GET with single-flight coalescing for COALESCED_GETS: callers asking for the
+        same URL at the same time share one request, and recent results are briefly
+        memoized. Underneath, bodies with validators are revalidated via If-None-Match.
+        """
+        endpoint = endpoint_template("GET", url)
+        if endpoint not in COALESCED_GETS:
+            return self._conditional_get(url, headers, timeout)
+        r, how = self.get_flight.do(
+            ("GET", url),
+            lambda: self._conditional_get(url, headers, timeout),
+            cacheable=lambda resp: resp.ok,
+        )
+        if how == "coalesced":
+            self.metrics.incr(endpoint, "coalesced")
+        elif how == "memo":
+            self.metrics.incr(endpoint, "memo_hits")
+        return r
+
+    def _conditional_get(self, url: str, headers: dict, timeout: int) -> requests.Response:
+        """One logical GET through the validator cache (HTTP_CACHED_GETS only): 304s are served from the cached body."""
+        cache = self.http_cache
+        if cache is None or endpoint_template("GET", url) not in HTTP_CACHED_GETS:
+            return self._request("GET", url, headers, timeout=timeout)
+        cached = cache.fresh(url)
+        if cached is not None:
+            return cached
+        r = cache.resolve(url, self._request("GET", url, headers, conditional=cache.conditional_headers(url), timeout=timeout))
+        if r.status_code == 304:
+            # Entry was evicted while the request was in flight: fetch the body unconditionally
+            r = cache.resolve(url, self._request("GET", url, headers, timeout=timeout))
+        return r
+
+    def _post(self, url: str, headers: dict, json_body: dict, timeout: int = 15,
+              on_status: Optional[Callable[[int], None]] = None) -> requests.Response:
+        return self._request("POST", url, headers, json=json_body, timeout=timeout, on_status=on_status)
 
     # ---------------------------
     # Project & folder structure
@@ -260,12 +570,18 @@ class DocumentProcessor:
         return name or "Unnamed"
 
     def get_project_name(self, project_id: int, headers: dict) -> str:
+        cached = self.project_names.get(project_id)
+        if cached and time.monotonic() - cached[1] <= PROJECT_NAME_TTL:
+            return cached[0]
         try:
             url = f"{self.base_url}/core/projects/{project_id}"
             r = self._get(url, headers=headers, timeout=10)
-            name = self.sanitize(r.json().get("projectOrClientName", f"Project_{project_id}"))
+            name = self.sanitize(response_json(r).get("projectOrClientName", f"Project_{project_id}"))
             logger.info(f"Resolved project {project_id} name: {name}")
+            self.project_names[project_id] = (name, time.monotonic())
             return name
+        except DeadlineExceeded:
+            raise  # a placeholder name would send files to the wrong prefix
         except Exception as e:
             logger.error(f"Failed to fetch project name: {e}")
             return f"Project_{project_id}"
@@ -277,15 +593,11 @@ class DocumentProcessor:
             url = f"{self.base_url}/core/folders?projectId={project_id}&offset={offset}&limit={limit}"
             try:
                 r = self._get(url, headers=headers)
-                payload = r.json()
-                for item in payload.get("items", []):
-                    fid = (item.get("folderId") or {}).get("native")
-                    if fid:
-                        roots.append(int(fid))
-                if not payload.get("hasMore", False):
+                page, has_more = parse_listing(r.content, _pick_folder_id)
+                roots.extend(page)
+                if not has_more:
                     break
                 offset += limit
-                time.sleep(0.1)
             except Exception as e:
                 logger.error(f"Failed to fetch root folders (offset={offset}): {e}")
                 break
@@ -297,11 +609,84 @@ class DocumentProcessor:
         """
         url = f"{self.base_url}/core/folders/{folder_id}"
         r = self._get(url, headers=headers, timeout=10)
-        data = r.json()
+        data = response_json(r)
         name = self.sanitize(data.get("name", "Unnamed"))
         parent_id = _extract_parent_id_from_folder_payload(data)
+        self._note_folder(folder_id, name, parent_id)
         return name, parent_id
 
+    # ---------------------------
+    # Durable per-project folder map
+    # ---------------------------
+    def use_project_folders(self, project_id: int) -> ProjectFolderMap:
+        """Load (once per container) and activate the stored folder map for a project."""
+        fmap = self.folder_maps.get(project_id)
+        if fmap is None:
+            fmap = self.folder_store.load(project_id) if self.folder_store else ProjectFolderMap(project_id)
+            self.folder_maps.put(fmap)
+        self._active_map = fmap
+        return fmap
+
+    def _note_folder(self, folder_id: int, name: str, parent_id: Optional[int]) -> None:
+        """Record a folder learned from the API in the active project's map."""
+        if folder_id:
+            self.folder_tree.add(folder_id, name, parent_id)
+
+    def begin_full_refresh(self, project_id: int) -> Optional[ProjectFolderMap]:
+        """
+        None if the stored map is recent enough to use as-is; otherwise an empty
+        map that a full crawl fills in (the old map keeps serving until it is swapped).
+        """
+        current = self.use_project_folders(project_id)
+        if len(current) and not current.needs_full_refresh():
+            return None
+        fresh = ProjectFolderMap(project_id)
+        self._active_map = fresh
+        return fresh
+
+    def finish_full_refresh(self, fresh: ProjectFolderMap, folder_map: Dict[int, str]) -> None:
+        """Swap in a crawled map if the crawl produced anything; otherwise keep the old one."""
+        if folder_map:
+            fresh.crawled_at = time.time()
+            fresh.dirty = True
+            self.folder_maps.put(fresh)
+            self._active_map = fresh
+        else:
+            self.use_project_folders(fresh.project_id)
+
+    def project_folder_paths(self, project_id: int, headers: dict) -> Dict[int, str]:
+        """{folderId: path} for a sync: from the stored map, or a full crawl when it is due."""
+        fresh = self.begin_full_refresh(project_id)
+        if fresh is None:
+            folder_map = self._active_map.paths()
+            logger.info(f"🗂️ Using stored folder map for project {project_id}: {len(folder_map)} folders")
+            return folder_map
+        folder_map = self.fetch_complete_folder_structure(project_id, headers)
+        self.finish_full_refresh(fresh, folder_map)
+        return folder_map
+
+    def invalidate_folder(self, project_id: int, folder_id: int) -> List[int]:
+        """Folder event: drop the folder and its subtree from the stored map."""
+        self.use_project_folders(project_id)
+        removed = self.folder_maps.invalidate(project_id, folder_id)
+        logger.info(f"🗂️ Invalidated folder {folder_id} (+{len(removed) - 1} descendants) for project {project_id}")
+        return removed
+
+    def save_project_folders(self) -> None:
+        """Persist any folder maps that changed during this invocation, then trim the cache to its bounds."""
+        if self.folder_store is not None:
+            for fmap in self.folder_maps.maps():
+                self.folder_store.save(fmap)
+        active = self._active_map.project_id if self._active_map is not None else None
+        self.folder_maps.trim(keep=active)
+
+    def _save_folder_map(self, fmap: ProjectFolderMap) -> None:
+        """FolderMapCache eviction hook: don't lose folders learned since the last save."""
+        if self.folder_store is not None:
+            self.folder_store.save(fmap)
+        if self._active_map is fmap:
+            self._active_map = None
+
     # def resolve_folder_path(self, folder_id: Optional[int], headers: dict, fallback: str = "Documents") -> str:
     #     """
     #     Resolve full folder path (A/B/C) for a given folderId by walking parents.
@@ -341,14 +726,16 @@ class DocumentProcessor:
         if not folder_id:
             return self.sanitize(fallback)
 
-        if folder_id in self.folder_cache:
-            return self.folder_cache[folder_id]
+        # Folder tree (durable project map): usually answers without an API call
+        known = self.folder_tree.path(folder_id)
+        if known:
+            return known
 
         try:
             name, parent_id = self._get_folder_info(folder_id, headers)
         except Exception as e:
             logger.error(f"Cannot fetch folder {folder_id}: {e}")
-            if strict:
+            if strict or isinstance(e, DeadlineExceeded):
                 # Signal caller to retry instead of misplacing
                 raise
             # Return a non-cached fallback
@@ -360,70 +747,137 @@ class DocumentProcessor:
         else:
             full = name
 
-        # Only cache resolved, non-fallback paths
-        self.folder_cache[int(folder_id)] = full
+        # _get_folder_info recorded (name, parent) in the tree: the path is answerable
+        # from it from now on, but only once every ancestor resolved (fallbacks never are)
         logger.info(f"Resolved folderId {folder_id} -> '{full}'")
         return full
 
 
-    def enumerate_all_folders(self, project_id: int, headers: dict) -> Set[str]:
+    def resolve_folder_paths(self, folder_ids: Iterable[int], headers: dict) -> Dict[int, str]:
         """
-        BFS over the folder tree using /core/folders/{id}/children to discover ALL subfolders,
-        including empty ones. Names are resolved via /core/folders/{id}.
-        Returns a set of full folder paths (e.g., {'Discovery/To Client/Responses', ...}).
+        {folderId: path} for many folders at once. Each round fetches, concurrently, the
+        first unknown ancestor of every unresolved folder, so chains climb one level per
+        round and an ancestor shared by many folders is fetched once. Folders whose chain
+        cannot be fetched are left out (callers pick their own fallback).
         """
-        roots = self._fetch_root_folders(project_id, headers)
-        if not roots:
-            return set()
-
-        # queue of (folder_id)
-        q: Deque[int] = deque(roots)
-
-        # ensure each root has a resolved path (this will walk parents if needed)
-        for fid in roots:
-            self.resolve_folder_path(fid, headers)
+        tree = self.folder_tree
+        pending = {int(fid) for fid in folder_ids if fid}
+        attempted: Set[int] = set()
 
-        visited: Set[int] = set()
-        paths: Set[str]   = set(self.folder_cache.values())
-
-        while q:
-            fid = q.popleft()
-            if fid in visited:
-                continue
-            visited.add(fid)
+        def fetch(fid: int) -> None:
+            try:
+                self._get_folder_info(fid, headers)  # records (name, parent) in the tree
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"⚠️ Cannot fetch folder {fid}: {e}")
 
-            # children listing
-            offset, limit = 0, 500
+        rounds = fetched = 0
+        with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as pool:
             while True:
-                url = f"{self.base_url}/core/folders/{fid}/children?projectId={project_id}&offset={offset}&limit={limit}"
-                try:
-                    r = self._get(url, headers=headers, timeout=15)
-                    payload = r.json()
-                except Exception as e:
-                    logger.error(f"Failed to fetch children of folder {fid}: {e}")
+                wanted: Dict[int, Set[int]] = {}   # unknown ancestor -> pending folders waiting on it
+                for fid in pending:
+                    missing = tree.unknown_ancestor(fid)
+                    if missing is not None:
+                        wanted.setdefault(missing, set()).add(fid)
+                # Already tried (failed, or fetched without landing in the tree): give up on those chains
+                for missing in [m for m in wanted if m in attempted]:
+                    pending -= wanted.pop(missing)
+                if not wanted:
                     break
+                level = list(wanted)
+                attempted.update(level)
+                list(pool.map(fetch, level))
+                rounds += 1
+                fetched += len(level)
+
+        resolved = {fid: tree.path(fid) for fid in pending}
+        resolved = {fid: path for fid, path in resolved.items() if path}
+        if fetched:
+            logger.info(f"🧗 Resolved {len(resolved)} folders via parents: {fetched} lookups in {rounds} rounds")
+        return resolved
+
+    def _list_children(self, project_id: int, folder_id: int, headers: dict) -> List[Tuple[int, Optional[str]]]:
+        """
+        All direct children of a folder as (childId, name-or-None), following pagination.
+        Raises on request failure so callers can decide how to degrade.
+        """
+        children: List[Tuple[int, Optional[str]]] = []
+        offset, limit = 0, 500
+        while True:
+            url = f"{self.base_url}/core/folders/{folder_id}/children?projectId={project_id}&offset={offset}&limit={limit}"
+            page, has_more = parse_listing(self._get(url, headers=headers, timeout=15).content, _pick_child)
+            children.extend(page)
+            if not has_more:
+                return children
+            offset += limit
 
-                items = payload.get("items", [])
-                if not items:
-                    break
+    def _list_frontier(self, pool: ThreadPoolExecutor, project_id: int, frontier: List[int],
+                       headers: dict) -> List[Tuple[int, Optional[List[Tuple[int, Optional[str]]]]]]:
+        """
+        Children of every folder in one BFS level, listed concurrently on `pool`
+        (the rate limiter and AIMD controller still bound what is in flight).
+        Returns [(folderId, children or None if the listing failed)] in frontier order.
+        """
+        def one(fid: int) -> Optional[List[Tuple[int, Optional[str]]]]:
+            try:
+                return self._list_children(project_id, fid, headers)
+            except DeadlineExceeded:
+                raise
+            except Exception as e:
+                logger.error(f"⚠️ Cannot fetch children of folder {fid}: {e}")
+                return None
+        return list(zip(frontier, pool.map(one, frontier)))
 
-                for child in items:
-                    cid = (child.get("folderId") or {}).get("native")
-                    if not cid:
-                        continue
-                    cid = int(cid)
+    def enumerate_all_folders(self, project_id: int, headers: dict) -> Set[str]:
+        """
+        BFS over the folder tree using /core/folders/{id}/children to discover ALL subfolders,
+        including empty ones, one level at a time with each level fetched concurrently.
+        A child's path is its parent's path plus the name from the children listing;
+        /core/folders/{id} is only called for roots and children listed without a name.
+        Returns a set of full folder paths (e.g., {'Discovery/To Client/Responses', ...}).
+        """
+        roots = self._fetch_root_folders(project_id, headers)
+        if not roots:
+            return set()
 
-                    child_path = self.resolve_folder_path(cid, headers, fallback="Documents")
-                    if child_path:
-                        paths.add(child_path)
+        with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as pool:
+            # ensure each root has a resolved path (this will walk parents if needed)
+            list(pool.map(lambda fid: self.resolve_folder_path(fid, headers), roots))
+
+            tree = self.folder_tree
+            visited: Set[int] = set(roots)
+            # A root that fell back to a guessed name is not in the tree and gives its children no prefix
+            path_of: Dict[int, str] = {fid: tree.path(fid) or "" for fid in roots}
+            paths: Set[str]   = {p for p in path_of.values() if p}
+
+            frontier = list(roots)
+            while frontier:
+                next_frontier: List[int] = []
+                unnamed: List[int] = []
+                for parent_id, children in self._list_frontier(pool, project_id, frontier, headers):
+                    parent_path = path_of.get(parent_id, "")
+                    for cid, cname in children or []:
+                        if cid in visited:
+                            continue
+                        visited.add(cid)
+                        next_frontier.append(cid)
+                        if not cname:
+                            unnamed.append(cid)
+                            continue
+                        cname = self.sanitize(cname)
+                        child_path = f"{parent_path}/{cname}" if parent_path else cname
+                        path_of[cid] = child_path
+                        self._note_folder(cid, cname, parent_id)
 
-                    if cid not in visited:
-                        q.append(cid)
+                # Only children listed without a name cost a per-folder lookup
+                for cid, child_path in zip(unnamed, pool.map(
+                    lambda cid: self.resolve_folder_path(cid, headers, fallback="Documents"), unnamed
+                )):
+                    path_of[cid] = child_path
 
-                if not payload.get("hasMore", False):
-                    break
-                offset += limit
-                time.sleep(0.1)
+                paths.update(path_of[cid] for cid in next_frontier if path_of.get(cid))
+                frontier = next_frontier
 
         logger.info(f"Folder tree size: {len(paths)}")
         return paths
@@ -526,7 +980,7 @@ class DocumentProcessor:
     
     def fetch_complete_folder_structure(self, project_id: int, headers: dict) -> Dict[int, str]:
         """
-        Preferred: BFS from roots.
+        Preferred: BFS from roots, listing all folders of a level concurrently.
         Fallback: if roots cannot be listed (e.g., 429), derive folder paths
                 by resolving unique folderIds seen in /core/documents.
         """
@@ -540,78 +994,78 @@ class DocumentProcessor:
             url = f"{self.base_url}/core/folders?projectId={project_id}&offset={offset}&limit={limit}"
             try:
                 r = self._get(url, headers=headers, timeout=15)
-                data = r.json()
+                page, has_more = parse_listing(r.content, _pick_folder_id)
             except Exception as e:
                 logger.error(f"⚠️ Failed to fetch root folders (offset={offset}): {e}")
                 break
 
-            for f in data.get("items", []):
-                fid = (f.get("folderId") or {}).get("native")
-                if fid:
-                    root_ids.append(int(fid))
-
-            if not data.get("hasMore", False):
+            root_ids.extend(page)
+            if not has_more:
                 break
             offset += limit
-            time.sleep(0.1)  # gentle throttle
 
-        # If we got roots, do the normal BFS
+        # If we got roots, do the normal BFS: one level at a time, each level's listings in parallel
         if root_ids:
-            q = deque()
-            for fid in root_ids:
+            def fetch_name(cid: int) -> Optional[str]:
                 try:
-                    full_path = self.resolve_folder_path(fid, headers, fallback="Documents")
-                    folder_map[fid] = full_path
-                    q.append(fid)
-                    logger.info(f"📁 ROOT {fid} -> '{full_path}'")
+                    info = self._get(f"{self.base_url}/core/folders/{cid}", headers=headers, timeout=15)
+                    return response_json(info).get("name", "Unnamed")
+                except DeadlineExceeded:
+                    raise
                 except Exception as e:
-                    logger.error(f"⚠️ Cannot resolve root folder {fid}: {e}")
+                    logger.error(f"⚠️ Cannot resolve child {cid} name: {e}")
+                    return None
 
-            while q:
-                parent_id = q.popleft()
-                parent_path = folder_map.get(parent_id, "")
-                offset = 0
-                while True:
-                    url = f"{self.base_url}/core/folders/{parent_id}/children?projectId={project_id}&offset={offset}&limit=500"
+            with ThreadPoolExecutor(max_workers=CRAWL_CONCURRENCY) as pool:
+                def resolve_root(fid: int) -> Tuple[str, bool]:
+                    """(path, resolved); an unresolvable root is crawled under 'Documents' for this sync only."""
                     try:
-                        c_res = self._get(url, headers=headers, timeout=15)
-                        payload = c_res.json()
+                        return self.resolve_folder_path(fid, headers, strict=True), True
+                    except DeadlineExceeded:
+                        raise
                     except Exception as e:
-                        logger.error(f"⚠️ Cannot fetch children of folder {parent_id}: {e}")
-                        break
+                        logger.error(f"⚠️ Cannot resolve root folder {fid}: {e}; using 'Documents' for this sync")
+                        return self.sanitize("Documents"), False
 
-                    for child in payload.get("items", []):
-                        cid = (child.get("folderId") or {}).get("native")
-                        if not cid:
-                            continue
-                        cid = int(cid)
+                frontier: List[int] = []
+                for fid, (full_path, resolved) in zip(root_ids, pool.map(resolve_root, root_ids)):
+                    folder_map[fid] = full_path
+                    frontier.append(fid)
+                    if resolved:
+                        # Only real paths go into the stored tree; a guess would outlive this sync
+                        self.folder_tree.set_root(fid, full_path)
+                    logger.info(f"📁 ROOT {fid} -> '{full_path}'")
 
-                        cname = child.get("name")
-                        if not cname:
-                            try:
-                                info = self._get(f"{self.base_url}/core/folders/{cid}", headers=headers, timeout=15)
-                                cname = info.json().get("name", "Unnamed")
-                            except Exception as e:
-                                logger.error(f"⚠️ Cannot resolve child {cid} name: {e}")
-                                continue
+                while frontier:
+                    level = self._list_frontier(pool, project_id, frontier, headers)
 
-                        cname = self.sanitize(cname)
-                        if not parent_path:
-                            try:
-                                parent_path = self.resolve_folder_path(parent_id, headers, fallback="")
-                                if parent_id and parent_path:
-                                    folder_map[parent_id] = parent_path
-                            except Exception as e:
-                                logger.error(f"⚠️ Could not resolve parent path for {parent_id}: {e}")
-                                parent_path = ""
-                        full_path = f"{parent_path}/{cname}" if parent_path else cname
-                        folder_map[cid] = full_path
-                        q.append(cid)
-
-                    if not payload.get("hasMore", False):
-                        break
-                    offset += 500
-                    time.sleep(0.1)  # gentle throttle
+                    # Children listed without a name: look those up concurrently too
+                    unnamed = [cid for _, children in level for cid, cname in (children or []) if not cname]
+                    names = dict(zip(unnamed, pool.map(fetch_name, unnamed)))
+
+                    next_frontier: List[int] = []
+                    for parent_id, children in level:
+                        parent_path = folder_map.get(parent_id, "")
+                        for cid, cname in children or []:
+                            cname = cname or names.get(cid)
+                            if not cname or cid in folder_map:
+                                continue
+                            cname = self.sanitize(cname)
+                            if not parent_path:
+                                try:
+                                    parent_path = self.resolve_folder_path(parent_id, headers, fallback="")
+                                    if parent_id and parent_path:
+                                        folder_map[parent_id] = parent_path
+                                except DeadlineExceeded:
+                                    raise
+                                except Exception as e:
+                                    logger.error(f"⚠️ Could not resolve parent path for {parent_id}: {e}")
+                                    parent_path = ""
+                            full_path = f"{parent_path}/{cname}" if parent_path else cname
+                            folder_map[cid] = full_path
+                            self._note_folder(cid, cname, parent_id)
+                            next_frontier.append(cid)
+                    frontier = next_frontier
 
             logger.info(f"📊 Structure fetch complete: {len(folder_map)} folders")
             return folder_map
@@ -630,12 +1084,7 @@ class DocumentProcessor:
             if fid:
                 unique_fids.add(int(fid))
 
-        cache: Dict[int, str] = {}
-        for fid in unique_fids:
-            path = self.resolve_folder_path(fid, headers, cache.get(fid) or "Documents")
-            if path:
-                folder_map[fid] = path
-                cache[fid] = path
+        folder_map.update(self.resolve_folder_paths(unique_fids, headers))
 
         logger.info(f"📊 Fallback structure built from documents: {len(folder_map)} folders")
         return folder_map
@@ -645,104 +1094,112 @@ class DocumentProcessor:
     # ---------------------------
     # Documents
     # ---------------------------
-    def fetch_all_documents(self, project_id: int, headers: dict) -> List[dict]:
+    def fetch_all_documents(self, project_id: int, headers: dict,
+                            on_error: Optional[Callable[[Exception], None]] = None) -> List[DocRecord]:
         """
         Use /core/documents?projectId=... to gather all docs.
-        Each item -> {id, filename, size, folder_id, folder_name, uploadDate}
+        Each item -> DocRecord {id, filename, size, folder_id, folder_name, modified}
+        """
+        docs = list(self.iter_documents(project_id, headers, on_error))
+        logger.info(f"📦 Total documents collected: {len(docs)}")
+        return docs
+
+    def iter_documents(self, project_id: int, headers: dict,
+                       on_error: Optional[Callable[[Exception], None]] = None) -> Iterator[DocRecord]:
+        """Documents one at a time, fetching the next listing page only when the previous one is used up."""
+        for page in self.iter_document_pages(project_id, headers, on_error):
+            yield from page
+
+    def iter_document_pages(self, project_id: int, headers: dict,
+                            on_error: Optional[Callable[[Exception], None]] = None) -> Iterator[List[DocRecord]]:
+        """
+        /core/documents?projectId=... one page at a time, in offset order (each doc as _pick_document).
+        Paging is by offset, so later pages are requested before earlier ones return:
+        the window of pages in flight doubles per page up to LIST_PREFETCH, the first
+        hasMore=false page ends the listing (pages requested past it are dropped), and
+        docs already yielded (offsets shifted by concurrent changes) are skipped.
+        A page that fails to load ends the listing (on_error(exc) is told, so callers can
+        tell a short listing from a complete one).
         """
-        docs, offset, limit = [], 0, 200
+        limit = 200
         logger.info(f"📥 Fetching all project documents via /core/documents?projectId={project_id}")
 
-        while True:
+        def fetch(offset: int) -> Tuple[List[DocRecord], bool]:
             url = f"{self.base_url}/core/documents?projectId={project_id}&offset={offset}&limit={limit}"
-            try:
-                r = self._get(url, headers=headers, timeout=20)
-                data = r.json()
-            except Exception as e:
-                logger.error(f"⚠️ Failed to list documents (offset={offset}): {e}")
-                break
-            batch = data.get("items", [])
-            for d in batch:
-                doc_id = (d.get("documentId") or {}).get("native")
-                if not doc_id:
-                    continue
-                docs.append({
-                    "id": int(doc_id),
-                    "filename": self.sanitize(d.get("filename", "unnamed")),
-                    "size": d.get("size", 0),
-                    "folder_id": (d.get("folderId") or {}).get("native"),
-                    "folder_name": d.get("folderName"),  # last segment, useful as fallback
-                    "modified": d.get("modifiedDate") or d.get("uploadDate")
-                })
-
-            logger.info(f"Fetched {len(batch)} documents at offset {offset}")
-            if not data.get("hasMore", False):
-                break
-            offset += limit
-            time.sleep(0.1)
-        logger.info(f"📦 Total documents collected: {len(docs)}")
-        return docs
+            r = self._get(url, headers=headers, timeout=20)
+            return parse_listing(r.content, self._pick_document)
+
+        max_window = max(1, LIST_PREFETCH)
+        window, next_offset = 1, 0
+        seen: Set[int] = set()
+        inflight: Deque[Tuple[int, Future]] = deque()
+        pool = ThreadPoolExecutor(max_workers=max_window)
+        try:
+            while True:
+                while len(inflight) < window:
+                    inflight.append((next_offset, pool.submit(fetch, next_offset)))
+                    next_offset += limit
+                offset, future = inflight.popleft()
+                try:
+                    batch, has_more = future.result()
+                except Exception as e:
+                    logger.error(f"⚠️ Failed to list documents (offset={offset}): {e}")
+                    if on_error is not None:
+                        on_error(e)
+                    return
+
+                logger.info(f"Fetched {len(batch)} documents at offset {offset}")
+                fresh = [d for d in batch if d.id not in seen]
+                if len(fresh) < len(batch):
+                    logger.info(f"Skipped {len(batch) - len(fresh)} documents already listed (offset {offset})")
+                seen.update(d.id for d in fresh)
+                yield fresh
+                if not has_more:
+                    return
+                window = min(max_window, window * 2)
+        finally:
+            for _, future in inflight:
+                future.cancel()
+            pool.shutdown(wait=False)
+
+    def _pick_document(self, d: dict) -> Optional[DocRecord]:
+        """/core/documents item -> the few fields a sync uses (None to skip)."""
+        doc_id = (d.get("documentId") or {}).get("native")
+        if not doc_id:
+            return None
+        return DocRecord(
+            id=int(doc_id),
+            filename=self.sanitize(d.get("filename", "unnamed")),
+            size=d.get("size", 0),
+            folder_id=(d.get("folderId") or {}).get("native"),
+            folder_name=d.get("folderName"),  # last segment, useful as fallback
+            modified=d.get("modifiedDate") or d.get("uploadDate"),
+        )
 
-    def resolve_path_via_parents(self, folder_id: int, headers: dict, cache: dict) -> Optional[str]:
+    def resolve_path_via_parents(self, folder_id: int, headers: dict) -> Optional[str]:
         """
         Build 'A/B/.../Z' by climbing parents using /core/folders/{id}.
-        Uses in-memory cache to minimize API calls.
+        Stops at the first ancestor the folder tree already knows; every folder
+        fetched on the way is added to the tree, so siblings cost no further calls.
         """
         if not folder_id:
             return None
         fid = int(folder_id)
-        if fid in cache:
-            return cache[fid]
-
-        chain = []
-        cursor = fid
-        while cursor:
-            if cursor in cache:
-                chain.append(cache[cursor])
-                break
-            try:
-                r = self._get(f"{self.base_url}/core/folders/{cursor}", headers=headers, timeout=15)
-                f = r.json()
-            except Exception as e:
-                logger.error(f"⚠️ Cannot fetch folder {cursor}: {e}")
-                return None
-            name = self.sanitize(f.get("name", "Unnamed"))
-            chain.append(name)
-            cursor = _extract_parent_id_from_folder_payload(f)
-
-        full_path = "/".join(reversed(chain))
-        cache[fid] = full_path
-        logger.info(f"Resolved folderId {fid} via parents -> '{full_path}'")
+        full_path = self.resolve_folder_paths([fid], headers).get(fid)
+        if full_path:
+            logger.info(f"Resolved folderId {fid} via parents -> '{full_path}'")
         return full_path
 
     def ensure_all_folders_and_map_docs(self, project_prefix: str, folder_map: Dict[int, str],
-                                        documents: List[dict], headers: dict):
+                                        documents: List[DocRecord], headers: dict):
         """
         Returns (folder_paths_set, docs_with_paths)
         - folder_paths_set: every folder path we must materialize in S3
-        - docs_with_paths: docs annotated with 'folder_path'
+        - docs_with_paths: the same docs, now answering 'folder_path'
         """
         folder_paths = set(folder_map.values())
-        cache = dict(folder_map)  # seed cache with known mappings {id: path}
-        docs_out = []
-
-        for d in documents:
-            fid = d.get("folder_id")
-            path = None
-            if fid:
-                # 1) BFS map result
-                path = folder_map.get(int(fid))
-                # 2) if missing, climb parents on-demand
-                if not path:
-                    path = self.resolve_path_via_parents(int(fid), headers, cache)
-            # 3) if still missing (rare), use last segment or 'Documents'
-            if not path:
-                path = self.sanitize(d.get("folder_name") or "Documents")
-
-            d2 = dict(d)
-            d2["folder_path"] = path
-            docs_out.append(d2)
-            folder_paths.add(path)
+        docs_out = self._map_doc_paths(folder_map, documents, headers)
+        folder_paths.update(d["folder_path"] for d in docs_out)
 
         # Always include a bucket for loose docs
         folder_paths.add("Documents")
@@ -758,6 +1215,30 @@ class DocumentProcessor:
 
         return folder_paths, docs_out
 
+    def _doc_paths(self, folder_map: Dict[int, str]) -> DocPaths:
+        """Path table shared by a sync's DocRecords (falls back to the sanitized folderName, else 'Documents')."""
+        return DocPaths(folder_map, lambda folder_name: self.sanitize(folder_name or "Documents"))
+
+    def _map_doc_paths(self, folder_map: Dict[int, str], documents: List[DocRecord], headers: dict,
+                       table: Optional[DocPaths] = None) -> List[DocRecord]:
+        """
+        Point docs at a shared path table (BFS map, else a batched parent climb, else folderName).
+        Records are updated in place: no per-doc copy and no per-doc path string.
+        """
+        table = table or self._doc_paths(folder_map)
+
+        # Folders the table lacks: climb all their parent chains together
+        unmapped = {int(d.folder_id) for d in documents if d.folder_id and not table.known(d.folder_id)}
+        climbed = self.resolve_folder_paths(unmapped, headers) if unmapped else {}
+
+        for d in documents:
+            fid = int(d.folder_id) if d.folder_id else None
+            if fid in unmapped and not table.known(fid):
+                # 2) the batched parent climb, 3) if still missing (rare), last segment or 'Documents'
+                table.add(fid, climbed.get(fid) or table.fallback(d.folder_name))
+            d.paths = table
+        return documents
+
     # def get_download_links_batch(self, ids: List[int], headers: dict) -> Dict[int, str]:
     #     """
     #     Get download links. Try batch; fallback to single for misses.
@@ -798,98 +1279,115 @@ class DocumentProcessor:
 
     def get_download_links_batch(self, ids: List[int], headers: dict) -> Dict[int, str]:
         """
-        Robust download-link fetch:
-        - Splits requests into small chunks to reduce 429s
-        - Retries 429/5xx with exponential backoff + jitter
-        - Falls back to single-doc batch calls (still the batch endpoint) with backoff
+        Download links via /core/documents/batch/download:
+        - Up to LINK_BATCH_CONCURRENCY chunks in flight; chunk size comes from self.link_batch
+          (grows while calls succeed, halves when a chunk hits a 429) and carries over between calls
+        - Links are keyed by the documentId each item returns, so reordered or short answers are fine
+        - Ids a chunk didn't return go back in the queue and are regrouped into later chunks,
+          at most LINK_RETRY_ROUNDS more times each; never one call per document
+        - 429/5xx retries of a single chunk happen only inside _request
         """
         out: Dict[int, str] = {}
         if not ids:
             return out
 
         endpoint = f"{self.base_url}/core/documents/batch/download"
-        CHUNK_SIZE = 10          # keep small to avoid rate limits
-        MAX_RETRIES = 5          # exponential backoff attempts
         TTL_SECONDS = 600
 
-        def post_batch(doc_ids: List[int]) -> Optional[List[dict]]:
-            attempt = 0
-            while attempt <= MAX_RETRIES:
-                try:
-                    r = self._post(
-                        endpoint,
-                        headers=headers,
-                        json_body={"DocumentIds": doc_ids, "DownloadUrlTimeToLive": TTL_SECONDS},
-                        timeout=20
-                    )
-                    payload = r.json()
-                    if isinstance(payload, list):
-                        return payload
-                    logger.error(f"Unexpected batch payload shape for ids={doc_ids[:3]}...: {payload}")
-                    return None
-                except requests.HTTPError as e:
-                    code = e.response.status_code if e.response is not None else 0
-                    if code == 429 or 500 <= code < 600:
-                        logger.error(f"Batch {doc_ids[:3]}... attempt {attempt} failed with {code}; backing off")
-                        self._sleep_backoff(attempt)
-                        attempt += 1
-                        continue
-                    logger.error(f"Batch request failed with {code}: {e}")
-                    return None
-                except Exception as e:
-                    logger.error(f"Batch request exception: {e}")
-                    self._sleep_backoff(attempt)
-                    attempt += 1
-            return None
-
-        # 1) Chunked batches
-        for i in range(0, len(ids), CHUNK_SIZE):
-            chunk = ids[i:i + CHUNK_SIZE]
-            payload = post_batch(chunk)
-            if payload and isinstance(payload, list):
-                for idx, item in enumerate(payload):
+        def post_batch(doc_ids: List[int]) -> Tuple[Optional[List[dict]], bool]:
+            """(payload or None on failure, whether any attempt was throttled)"""
+            statuses: List[int] = []
+            try:
+                r = self._post(
+                    endpoint,
+                    headers=headers,
+                    json_body={"DocumentIds": doc_ids, "DownloadUrlTimeToLive": TTL_SECONDS},
+                    timeout=20,
+                    on_status=statuses.append
+                )
+                payload = response_json(r)
+            except DeadlineExceeded:
+                raise
+            except requests.HTTPError as e:
+                code = e.response.status_code if e.response is not None else 0
+                logger.error(f"Batch {doc_ids[:3]}... failed with {code}: {e}")
+                return None, 429 in statuses
+            except Exception as e:
+                logger.error(f"Batch request exception for {doc_ids[:3]}...: {e}")
+                return None, 429 in statuses
+            if isinstance(payload, list):
+                return payload, 429 in statuses
+            logger.error(f"Unexpected batch payload shape for ids={doc_ids[:3]}...: {payload}")
+            return None, 429 in statuses
+
+        def links_in(doc_ids: List[int], payload: List[dict]) -> Dict[int, str]:
+            wanted = set(doc_ids)
+            found: Dict[int, str] = {}
+            keyed = False
+            for item in payload:
+                doc_id, link = _pick_link(item or {})
+                if doc_id is None:
+                    continue
+                keyed = True
+                if link and doc_id in wanted:
+                    found[doc_id] = link
+            if not keyed and len(payload) == len(doc_ids):
+                # Items without a documentId: only a same-length answer can be matched by position
+                for doc_id, item in zip(doc_ids, payload):
                     link = (item or {}).get("downloadLink")
                     if link:
-                        out[chunk[idx]] = link
-            else:
-                logger.error(f"Batch download failed for chunk starting at index {i}; will fallback per-doc")
-
-        # 2) Fallback per-doc with backoff
-        missing = [d for d in ids if d not in out]
-        for doc_id in missing:
-            attempt = 0
-            while attempt <= MAX_RETRIES:
-                try:
-                    r = self._post(
-                        endpoint,
-                        headers=headers,
-                        json_body={"DocumentIds": [doc_id], "DownloadUrlTimeToLive": TTL_SECONDS},
-                        timeout=15
-                    )
-                    arr = r.json() if r.ok else []
-                    if isinstance(arr, list) and arr and arr[0].get("downloadLink"):
-                        out[doc_id] = arr[0]["downloadLink"]
-                        break
-                    logger.error(f"No download link for doc {doc_id} (attempt {attempt})")
-                    self._sleep_backoff(attempt)
-                    attempt += 1
-                except requests.HTTPError as e:
-                    code = e.response.status_code if e.response is not None else 0
-                    if code == 429 or 500 <= code < 600:
-                        logger.error(f"Single-doc {doc_id} attempt {attempt} got {code}; backing off")
-                        self._sleep_backoff(attempt)
-                        attempt += 1
+                        found[doc_id] = link
+            return found
+
+        pending: Deque[int] = deque(dict.fromkeys(ids))   # de-duplicated, in order
+        tries: Dict[int, int] = {}
+        given_up: List[int] = []
+        workers = max(1, LINK_BATCH_CONCURRENCY)
+        running: Dict[Future, List[int]] = {}
+        pool = ThreadPoolExecutor(max_workers=workers)
+        try:
+            while pending or running:
+                while pending and len(running) < workers:
+                    size = self.link_batch.current()
+                    chunk = [pending.popleft() for _ in range(min(size, len(pending)))]
+                    for doc_id in chunk:
+                        tries[doc_id] = tries.get(doc_id, 0) + 1
+                    running[pool.submit(post_batch, chunk)] = chunk
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    chunk = running.pop(fut)
+                    payload, throttled = fut.result()
+                    if payload is not None or throttled:
+                        self.link_batch.record(throttled)
+                    found = links_in(chunk, payload) if payload is not None else {}
+                    out.update(found)
+
+                    missing = [d for d in chunk if d not in found]
+                    if not missing:
                         continue
-                    logger.error(f"Single-doc {doc_id} failed with {code}: {e}")
-                    break
-                except Exception as e:
-                    logger.error(f"Single-doc {doc_id} exception: {e}")
-                    self._sleep_backoff(attempt)
-                    attempt += 1
-
+                    # Once the retry budget is spent the API is clearly unhealthy: stop re-asking
+                    if not self.retry.budget.available():
+                        logger.error(f"Retry budget exhausted; not retrying links for {len(missing)} docs")
+                        given_up.extend(missing)
+                        continue
+                    for doc_id in missing:
+                        if tries[doc_id] <= LINK_RETRY_ROUNDS:
+                            pending.append(doc_id)
+                        else:
+                            given_up.append(doc_id)
+        except DeadlineExceeded as e:
+            # Return what we have; the remaining docs are skipped, not failed
+            logger.warning(f"⏱️ Stopping link fetch with {len(out)}/{len(tries)} links: {e}")
+        finally:
+            for fut in running:
+                fut.cancel()
+            pool.shutdown(wait=False)
+
+        if given_up:
+            logger.error(f"No download link for {len(given_up)} docs: {given_up[:10]}")
         return out
 
-
     # ---------------------------
     # S3 ops
     # ---------------------------
@@ -903,17 +1401,20 @@ class DocumentProcessor:
                 all_levels.add(lvl)
 
         for rel in sorted(all_levels):
-            key = _to_s3_key(project_prefix, rel, ".placeholder")
-            try:
-                self.s3.head_object(Bucket=self.bucket, Key=key)
-                logger.info(f"S3 folder exists: s3://{self.bucket}/{key}")
-            except ClientError as e:
-                if e.response.get("Error", {}).get("Code") == "404":
-                    self.s3.put_object(Bucket=self.bucket, Key=key, Body=b"")
-                    logger.info(f"Created folder placeholder: s3://{self.bucket}/{key}")
-                else:
-                    logger.error(f"head_object error for {key}: {e}")
-    
+            self._ensure_placeholder(_to_s3_key(project_prefix, rel, ".placeholder"))
+
+    def _ensure_placeholder(self, key: str) -> None:
+        # DeadlineExceeded from _s3_call is not a ClientError, so it reaches the caller
+        try:
+            self._s3_call("head_object", Bucket=self.bucket, Key=key)
+            logger.info(f"S3 folder exists: s3://{self.bucket}/{key}")
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") == "404":
+                self._s3_call("put_object", Bucket=self.bucket, Key=key, Body=b"")
+                logger.info(f"Created folder placeholder: s3://{self.bucket}/{key}")
+            else:
+                logger.error(f"head_object error for {key}: {e}")
+
     def upload_to_s3(self, key: str, content: bytes, filename: str,
                      metadata: Optional[dict] = None, tags: Optional[dict] = None) -> bool:
         try:
@@ -934,24 +1435,170 @@ class DocumentProcessor:
                 kwargs["Tagging"] = tagstr
 
             logger.info(f"Uploading → s3://{self.bucket}/{key} (ContentType={content_type})")
-            self.s3.put_object(**kwargs)
+            self._s3_call("put_object", **kwargs)
             logger.info(f"✅ Uploaded: s3://{self.bucket}/{key}")
             return True
+        except DeadlineExceeded:
+            raise  # not a failure: the caller skips or re-queues
         except Exception as e:
             logger.error(f"❌ Upload failed for s3://{self.bucket}/{key}: {e}")
             return False
 
+    def _transfer_document(self, d: DocRecord, url: Optional[str], project_id: int, project_prefix: str) -> Optional[bool]:
+        """
+        Download one document from its presigned link and upload it to its exact S3 path.
+        Returns None (skipped) when the invocation deadline leaves no time to start it.
+        """
+        doc_id = d["id"]
+        filename = d["filename"]
+        folder_path = d["folder_path"]
+        s3_key = f"{project_prefix}{folder_path}/{filename}"
+
+        if not url:
+            if self.deadline.expired():
+                return None
+            logger.error(f"No download link for doc {doc_id} ({filename}); doc={json.dumps(dict(d))}")
+            return False
+
+        try:
+            resp = self._download(url)
+        except DeadlineExceeded as e:
+            logger.warning(f"⏱️ Skipping doc {doc_id} ({filename}): {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Download failed for doc {doc_id} ({filename}): {e}")
+            return False
+
+        try:
+            ok = self.upload_to_s3(
+                s3_key,
+                resp.content,
+                filename,
+                metadata={
+                    "documentId": str(doc_id),
+                    "projectId": str(project_id),
+                    "folderId": str(d.get("folder_id") or ""),
+                    "folderPath": folder_path
+                },
+                tags={"origin": "filevine", "fv_docid": str(doc_id), "projectId": str(project_id)}
+            )
+        except DeadlineExceeded as e:
+            logger.warning(f"⏱️ Skipping upload of doc {doc_id} ({filename}): {e}")
+            return None
+        if ok and S3_PUBLIC_READ:
+            try:
+                self._s3_call("put_object_acl", Bucket=self.bucket, Key=s3_key, ACL="public-read")
+            except ClientError:
+                pass
+        return ok
+
     # ---------------------------
     # Full sync (folders first, then docs)
     # ---------------------------
-    def sync_documents(self, project_id: int, headers: dict):
+    def _attach_metrics(self, result: dict) -> dict:
+        """Add this sync's request metrics to its result (and emit EMF lines if enabled)."""
+        result["metrics"] = self.metrics.snapshot()
+        result["metrics"]["retryBudget"] = self.retry.budget.snapshot()
+        if self.http_cache is not None:
+            result["metrics"]["httpCache"] = self.http_cache.stats()
+        result["metrics"]["folderCache"] = self.folder_maps.stats()
+        result["metrics"]["linkBatch"] = self.link_batch.snapshot()
+        if FV_METRICS_EMF:
+            self.metrics.emit_emf({"Operation": "sync_documents"})
+        return result
+
+    @staticmethod
+    def _sync_result(project_id: int, project_name: str, outcomes: List[Optional[bool]]) -> dict:
+        """Result dict from per-document outcomes (True uploaded, False failed, None skipped at the deadline)."""
+        uploaded = sum(1 for ok in outcomes if ok)
+        skipped  = sum(1 for ok in outcomes if ok is None)
+        result = {
+            "status": "partial" if skipped else "success",
+            "projectId": project_id,
+            "projectName": project_name,
+            "documentCount": len(outcomes),
+            "uploadedCount": uploaded,
+            "failedCount": len(outcomes) - uploaded - skipped
+        }
+        if skipped:
+            result["skippedCount"] = skipped
+            logger.warning(f"⏱️ Deadline reached: {skipped} documents left for the next sync")
+        return result
+
+    def _load_sync_state(self, project_id: int) -> SyncState:
+        """Stored incremental-sync state (a blank one, i.e. full sweeps, when there is no store)."""
+        return self.sync_state_store.load(project_id) if self.sync_state_store else SyncState(project_id)
+
+    def _select_changed(self, documents: List[DocRecord], state: SyncState,
+                        cutoff: Optional[float]) -> List[DocRecord]:
+        """Docs to transfer: all on a full sweep, else those modified at/after the cutoff."""
+        return [d for d in documents if state.changed(d.modified, cutoff)]
+
+    def _finish_sync(self, project_id: int, project_name: str, outcomes: List[Optional[bool]],
+                     state: SyncState, cutoff: Optional[float],
+                     stopped: Optional[DeadlineExceeded] = None) -> dict:
+        """
+        Result dict; advances the watermark when the listing was complete and nothing failed or was skipped.
+        `stopped`: the deadline ended the sync before every phase ran (always a partial result).
+        """
+        result = self._sync_result(project_id, project_name, outcomes)
+        result["syncMode"] = "full" if cutoff is None else "incremental"
+        if stopped is not None:
+            logger.warning(f"⏱️ Sync stopped early: {stopped}")
+            result["status"] = "partial"
+            result["skippedCount"] = result.get("skippedCount", 0)
+            result["reason"] = "deadline"
+        if cutoff is not None:
+            result["listedCount"] = state.listed
+        if (self.sync_state_store is not None and not state.incomplete
+                and result["status"] == "success" and not result["failedCount"]):
+            state.commit(full=cutoff is None)
+            self.sync_state_store.save(state)
+        logger.info(f"Sync complete: {result}")
+        return self._attach_metrics(result)
+
+    def sync_documents(self, project_id: int, headers: dict, full_sweep: bool = False):
+        self.metrics.reset()
+        self.retry.budget.reset()
+        self.get_flight.clear()
+        if self.http_cache is not None:
+            self.http_cache.reset_stats()
         project_name   = self.get_project_name(project_id, headers)
         project_prefix = f"{S3_PREFIX}{self.sanitize(project_name)}/"
-        logger.info(f"Starting full sync for project {project_id} -> prefix {project_prefix}")
 
-        # Build folder tree, get docs
-        folder_map = self.fetch_complete_folder_structure(project_id, headers)
-        documents  = self.fetch_all_documents(project_id, headers)
+        # Incremental mode: only docs modified since the watermark (minus the overlap)
+        state  = self._load_sync_state(project_id)
+        cutoff = state.cutoff(force_full=full_sweep)
+        logger.info(f"Starting {'full' if cutoff is None else 'incremental'} sync for project {project_id} "
+                    f"-> prefix {project_prefix}")
+
+        # The deadline can end any phase; whatever was not transferred is reported as skipped
+        docs: List[DocRecord] = []
+        outcomes: List[Optional[bool]] = []
+        try:
+            if SYNC_PIPELINE:
+                folder_map = self.project_folder_paths(project_id, headers)
+                outcomes = self._sync_pipelined(project_id, headers, project_prefix, folder_map, state, cutoff,
+                                                docs, outcomes)
+            else:
+                outcomes = self._sync_batch(project_id, headers, project_prefix, state, cutoff, docs)
+        except DeadlineExceeded as e:
+            state.listing_failed(e)
+            outcomes = outcomes + [None] * (len(docs) - len(outcomes))
+            return self._finish_sync(project_id, project_name, outcomes, state, cutoff, stopped=e)
+        return self._finish_sync(project_id, project_name, outcomes, state, cutoff)
+
+    def _sync_batch(self, project_id: int, headers: dict, project_prefix: str, state: SyncState,
+                    cutoff: Optional[float], docs: List[DocRecord]) -> List[Optional[bool]]:
+        """
+        Phase-by-phase sync: folders, full document list, placeholders, links, transfers.
+        The docs to transfer are appended to `docs` as soon as they are known.
+        """
+        # Folder tree (stored map, or a full crawl when due), get docs
+        folder_map = self.project_folder_paths(project_id, headers)
+        documents  = self.fetch_all_documents(project_id, headers, on_error=state.listing_failed)
+        documents  = self._select_changed(documents, state, cutoff)
+        docs.extend(documents)
 
         # Materialize folders and attach exact paths to docs
         # _, docs_with_paths = self.ensure_all_folders_and_map_docs(project_prefix, folder_map, documents, headers)
@@ -959,116 +1606,131 @@ class DocumentProcessor:
         folder_paths, docs_with_paths = self.ensure_all_folders_and_map_docs(
             project_prefix, folder_map, documents, headers
         )
+        if cutoff is not None:
+            # Incremental: only the changed docs' folders (a full sweep materializes the rest)
+            folder_paths = {d.folder_path for d in docs_with_paths} | {"Documents"}
 
         # Create placeholders for every path and ALL parent levels
         self.ensure_placeholders(project_prefix, folder_paths)
 
+        outcomes: List[Optional[bool]] = []
         if not docs_with_paths:
             logger.info("No documents to upload.")
-            result = {
-                "status": "success",
-                "projectId": project_id,
-                "projectName": project_name,
-                "documentCount": 0,
-                "uploadedCount": 0,
-                "failedCount": 0
-            }
-            logger.info(f"Full sync complete: {result}")
-            return result
-
-        # Upload each doc to its exact path
-        uploaded = failed = 0
-        ids = [d["id"] for d in docs_with_paths]
-        link_by_id = self.get_download_links_batch(ids, headers)
-
-        for d in docs_with_paths:
-            doc_id = d["id"]
-            filename = d["filename"]
-            folder_path = d["folder_path"]
-            s3_key = f"{project_prefix}{folder_path}/{filename}"
-
-            url = link_by_id.get(doc_id)
-            if not url:
-                logger.error(f"No download link for doc {doc_id} ({filename}); doc={json.dumps(d)}")
-                failed += 1
-                continue
-
-            # Gentle client-side throttle
-            time.sleep(0.1)
-
-            # Retry the file GET on transient errors
-            get_attempt = 0
-            MAX_GET_RETRIES = 4
+        else:
+            # Upload each doc to its exact path; the transfer controller bounds in-flight downloads
+            ids = [d["id"] for d in docs_with_paths]
+            link_by_id = self.get_download_links_batch(ids, headers)
+
+            with ThreadPoolExecutor(max_workers=self.transfer_concurrency.max_limit) as pool:
+                outcomes = list(pool.map(
+                    lambda d: self._transfer_document(d, link_by_id.get(d["id"]), project_id, project_prefix),
+                    docs_with_paths
+                ))
+            logger.info(f"Concurrency after sync: api={self.concurrency.snapshot()} "
+                        f"transfers={self.transfer_concurrency.snapshot()}")
+        return outcomes
+
+    def _sync_pipelined(self, project_id: int, headers: dict, project_prefix: str,
+                        folder_map: Dict[int, str], state: Optional[SyncState] = None,
+                        cutoff: Optional[float] = None, docs: Optional[List[DocRecord]] = None,
+                        outcomes: Optional[List[Optional[bool]]] = None) -> List[Optional[bool]]:
+        """
+        Full sync as three stages joined by bounded queues:
+          listing  -> one page at a time: map folder paths, add placeholders for new paths
+          links    -> download links per PIPELINE_LINK_BATCH docs (fetched just before use)
+          transfer -> transfer_concurrency.max_limit workers download and upload
+        A slow stage blocks the ones before it, so at most a few batches are held at once.
+        With a cutoff (incremental), only changed docs leave the listing stage.
+        Returns per-document outcomes as for _transfer_document; listed docs go to `docs`,
+        outcomes to `outcomes` as they finish. A deadline in the listing or placeholder stage is
+        re-raised once every stage has stopped.
+        """
+        state = state or SyncState(project_id)
+        docs_seen: List[DocRecord] = docs if docs is not None else []
+        stopped: List[DeadlineExceeded] = []
+        workers  = self.transfer_concurrency.max_limit
+        links_q: "queue.Queue[Optional[List[DocRecord]]]" = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        work_q: "queue.Queue[Optional[Tuple[DocRecord, Optional[str]]]]" = queue.Queue(
+            maxsize=PIPELINE_QUEUE_SIZE * PIPELINE_LINK_BATCH)
+        outcomes = outcomes if outcomes is not None else []
+        outcomes_lock = threading.Lock()
+        # Incremental: placeholders only for the changed docs' folders (a full sweep does the rest)
+        placed: Set[str] = (set(folder_map.values()) if cutoff is None else set()) | {"Documents"}
+        table = self._doc_paths(folder_map)  # one path table for every page
+
+        def list_stage() -> None:
             try:
-                while True:
-                    try:
-                        resp = self.http.get(url, timeout=30)
-                        resp.raise_for_status()
-                        break
-                    except requests.HTTPError as e:
-                        code = e.response.status_code if e.response is not None else 0
-                        if code in (429,) or 500 <= code < 600:
-                            self._sleep_backoff(get_attempt)
-                            get_attempt += 1
-                            if get_attempt > MAX_GET_RETRIES:
-                                raise
-                            continue
-                        raise
-                    except Exception as e:
-                        # network timeouts or other transient errors
-                        self._sleep_backoff(get_attempt)
-                        get_attempt += 1
-                        if get_attempt > MAX_GET_RETRIES:
-                            raise
+                for page in self.iter_document_pages(project_id, headers, on_error=state.listing_failed):
+                    docs = self._select_changed(page, state, cutoff)
+                    if not docs:
                         continue
+                    docs = self._map_doc_paths(folder_map, docs, headers, table)
+                    docs_seen.extend(docs)
+                    new_paths = {d["folder_path"] for d in docs} - placed
+                    if new_paths:
+                        placed.update(new_paths)
+                        self.ensure_placeholders(project_prefix, new_paths)
+                    for i in range(0, len(docs), PIPELINE_LINK_BATCH):
+                        links_q.put(docs[i:i + PIPELINE_LINK_BATCH])
+            except DeadlineExceeded as e:
+                logger.warning(f"⏱️ Stopping document listing: {e}")
+                state.listing_failed(e)
+                stopped.append(e)
             except Exception as e:
-                logger.error(f"Download failed for doc {doc_id} ({filename}): {e}")
-                failed += 1
-                continue
-
+                logger.error(f"Document listing stopped: {e}")
+                state.listing_failed(e)
+            finally:
+                links_q.put(None)
 
-            ok = self.upload_to_s3(
-                s3_key,
-                resp.content,
-                filename,
-                metadata={
-                    "documentId": str(doc_id),
-                    "projectId": str(project_id),
-                    "folderId": str(d.get("folder_id") or ""),
-                    "folderPath": folder_path
-                },
-                tags={"origin": "filevine", "fv_docid": str(doc_id), "projectId": str(project_id)}
-            )
-            # if ok and S3_PUBLIC_READ:
-            #     try:
-            #         self.s3.put_object_acl(Bucket=self.bucket, Key=s3_key, ACL="public-read")
-            #     except ClientError:
-            #         pass
-            #     uploaded += 1
-            # else:
-            #     failed += 1
-            if ok:
-                if S3_PUBLIC_READ:
+        def link_stage() -> None:
+            try:
+                while True:
+                    docs = links_q.get()
+                    if docs is None:
+                        return
                     try:
-                        self.s3.put_object_acl(Bucket=self.bucket, Key=s3_key, ACL="public-read")
-                    except ClientError:
-                        pass
-                uploaded += 1
-            else:
-                failed += 1
-
-
+                        links = self.get_download_links_batch([d["id"] for d in docs], headers)
+                    except Exception as e:
+                        logger.error(f"Download link lookup failed for {len(docs)} docs: {e}")
+                        links = {}
+                    for d in docs:
+                        work_q.put((d, links.get(d["id"])))
+            finally:
+                for _ in range(workers):
+                    work_q.put(None)
+
+        def placeholder_stage() -> None:
+            try:
+                self.ensure_placeholders(project_prefix, set(placed))
+            except DeadlineExceeded as e:
+                logger.warning(f"⏱️ Stopping placeholders: {e}")
+                stopped.append(e)
 
-        result = {
-            "status": "success",
-            "projectId": project_id,
-            "projectName": project_name,
-            "documentCount": len(docs_with_paths),
-            "uploadedCount": uploaded,
-            "failedCount": failed
-        }
-        logger.info(f"Full sync complete: {result}")
-        return result
+        def transfer_stage() -> None:
+            while True:
+                item = work_q.get()
+                if item is None:
+                    return
+                d, url = item
+                try:
+                    outcome = self._transfer_document(d, url, project_id, project_prefix)
+                except Exception as e:
+                    logger.error(f"Transfer failed for doc {d['id']}: {e}")
+                    outcome = False
+                with outcomes_lock:
+                    outcomes.append(outcome)
+
+        with ThreadPoolExecutor(max_workers=workers + 3) as pool:
+            # Placeholders for the known tree go up alongside the first transfers
+            stages = [pool.submit(placeholder_stage), pool.submit(list_stage), pool.submit(link_stage)]
+            stages += [pool.submit(transfer_stage) for _ in range(workers)]
+            for f in stages:
+                f.result()
+        logger.info(f"Concurrency after sync: api={self.concurrency.snapshot()} "
+                    f"transfers={self.transfer_concurrency.snapshot()}")
+        if stopped:
+            raise stopped[0]
+        return outcomes
 
     # ---------------------------
     # Webhook: single upload & delete
@@ -1083,27 +1745,24 @@ class DocumentProcessor:
             project_id    = self.extract_project_id(body)
             project_name  = self.get_project_name(project_id, headers)
             project_prefix = _to_s3_key(self.prefix, project_name) + "/"
+            self.use_project_folders(project_id)
 
             # Fetch doc metadata
             meta_url = f"{self.base_url}/core/documents/{document_id}"
             r = self._get(meta_url, headers=headers, timeout=10)
-            doc = r.json()
+            doc = response_json(r)
 
             filename    = self.sanitize(doc.get("filename") or f"document_{document_id}")
             folder_id   = (doc.get("folderId") or {}).get("native")
             folder_nm   = self.sanitize(doc.get("folderName") or "Documents")
-            # Try to strictly resolve the full path with backoff
-            attempt = 0
-            while True:
-                try:
-                    folder_path = self.resolve_folder_path(folder_id, headers, fallback=folder_nm, strict=True)
-                    break
-                except Exception:
-                    if attempt >= 5:
-                        # Make it retryable – do not upload to a guessed folder
-                        return self.error_response(503, "Rate-limited resolving folder path; please retry")
-                    self._sleep_backoff(attempt)
-                    attempt += 1
+            # Strictly resolve the full path (the request layer already retried 429/5xx)
+            try:
+                folder_path = self.resolve_folder_path(folder_id, headers, fallback=folder_nm, strict=True)
+            except DeadlineExceeded:
+                raise
+            except Exception:
+                # Make it retryable – do not upload to a guessed folder
+                return self.error_response(503, "Rate-limited resolving folder path; please retry")
 
             # Ensure all levels exist and upload
             self.ensure_placeholders(project_prefix, {folder_path})
@@ -1118,8 +1777,7 @@ class DocumentProcessor:
             if not url:
                 return self.error_response(502, f"No download link for document {document_id}")
 
-            binr = self.http.get(url, timeout=30)
-            binr.raise_for_status()
+            binr = self._download(url)
 
             s3_key = _to_s3_key(project_prefix, folder_path, filename)
             logger.info(f"Single upload → '{filename}' → s3://{self.bucket}/{s3_key}")
@@ -1138,12 +1796,14 @@ class DocumentProcessor:
             )
             if ok and S3_PUBLIC_READ:
                 try:
-                    self.s3.put_object_acl(Bucket=self.bucket, Key=s3_key, ACL="public-read")
+                    self._s3_call("put_object_acl", Bucket=self.bucket, Key=s3_key, ACL="public-read")
                 except ClientError:
                     pass
                 return self.success_response({"s3Key": s3_key})
 
             return self.error_response(500, "Failed to upload to S3")
+        except DeadlineExceeded:
+            raise  # lambda_handler re-queues the event
         except Exception as e:
             logger.error(f"Single-document upload failed: {e}")
             return self.error_response(500, "Internal server error")
@@ -1157,39 +1817,40 @@ class DocumentProcessor:
         return self.handle_single_document_upload(body, headers)
 
     def find_keys_by_docid(self, project_prefix: str, doc_id: int) -> List[str]:
-        matches: List[str] = []
-        token, target = None, str(doc_id)
+        target = str(doc_id)
+        return [k for k in self._list_project_keys(project_prefix) if self._key_has_docid(k, target)]
+
+    def _list_project_keys(self, project_prefix: str) -> List[str]:
+        """All non-placeholder object keys under a project prefix."""
+        keys: List[str] = []
+        token = None
         while True:
             kwargs = {"Bucket": self.bucket, "Prefix": project_prefix, "MaxKeys": 1000}
             if token:
                 kwargs["ContinuationToken"] = token
-            page = self.s3.list_objects_v2(**kwargs)
-
-            for obj in page.get("Contents", []):
-                k = obj["Key"]
-                if k.endswith("/.placeholder"):
-                    continue
-                try:
-                    t = self.s3.get_object_tagging(Bucket=self.bucket, Key=k)
-                    tagset = {d["Key"]: d["Value"] for d in t.get("TagSet", [])}
-                    if tagset.get("fv_docid") == target:
-                        matches.append(k)
-                        continue
-                except ClientError as e:
-                    logger.error(f"get_object_tagging failed for {k}: {e}")
-                try:
-                    h = self.s3.head_object(Bucket=self.bucket, Key=k)
-                    meta = {(mk or "").lower(): mv for mk, mv in (h.get("Metadata") or {}).items()}
-                    if meta.get("documentid") == target:
-                        matches.append(k)
-                except ClientError as e:
-                    logger.error(f"head_object failed for {k}: {e}")
-
-            if page.get("IsTruncated"):
-                token = page.get("NextContinuationToken")
-            else:
-                break
-        return matches
+            page = self._s3_call("list_objects_v2", **kwargs)
+            keys.extend(o["Key"] for o in page.get("Contents", []) if not o["Key"].endswith("/.placeholder"))
+            if not page.get("IsTruncated"):
+                return keys
+            token = page.get("NextContinuationToken")
+
+    def _key_has_docid(self, k: str, target: str) -> bool:
+        """Match an S3 object to a Filevine documentId via its fv_docid tag or documentId metadata."""
+        try:
+            t = self._s3_call("get_object_tagging", Bucket=self.bucket, Key=k)
+            tagset = {d["Key"]: d["Value"] for d in t.get("TagSet", [])}
+            if tagset.get("fv_docid") == target:
+                return True
+        except ClientError as e:
+            logger.error(f"get_object_tagging failed for {k}: {e}")
+        try:
+            h = self._s3_call("head_object", Bucket=self.bucket, Key=k)
+            meta = {(mk or "").lower(): mv for mk, mv in (h.get("Metadata") or {}).items()}
+            if meta.get("documentid") == target:
+                return True
+        except ClientError as e:
+            logger.error(f"head_object failed for {k}: {e}")
+        return False
 
     def handle_document_delete(self, body: dict, headers: dict):
         try:
@@ -1210,13 +1871,15 @@ class DocumentProcessor:
             deleted = []
             for k in keys:
                 try:
-                    self.s3.delete_object(Bucket=self.bucket, Key=k)
+                    self._s3_call("delete_object", Bucket=self.bucket, Key=k)
                     logger.info(f"Deleted S3 object: s3://{self.bucket}/{k}")
                     deleted.append(k)
                 except ClientError as e:
                     logger.error(f"Failed to delete {k}: {e}")
 
             return self.success_response({"status": "deleted", "projectId": project_id, "documentId": document_id, "deletedKeys": deleted})
+        except DeadlineExceeded:
+            raise  # lambda_handler re-queues the event
         except Exception as e:
             logger.error(f"Document delete handler failed: {e}")
             return self.error_response(500, "Internal server error")